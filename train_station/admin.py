@@ -9,6 +9,8 @@ from train_station.models import (
     Trip,
     Order,
     Ticket,
+    SeatHold,
+    HeldSeat,
 )
 
 admin.site.register(Crew)
@@ -19,3 +21,5 @@ admin.site.register(Route)
 admin.site.register(Trip)
 admin.site.register(Order)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
+admin.site.register(HeldSeat)
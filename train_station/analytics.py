@@ -0,0 +1,117 @@
+"""Daily load rollups per route and train type.
+
+``DailyLoad`` rows are kept in step with bookings: ticket sales shift
+``tickets_sold`` in place, and changes to trips or trains recompute the
+affected ``(route, date)`` rows from the trips' own counters. The
+``rebuild_daily_loads`` command recomputes all of them.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from train_station.filters import day_bounds
+from train_station.models import DailyLoad, Trip
+
+
+def daily_load_key(route_id, departure_time):
+    return route_id, timezone.localdate(departure_time)
+
+
+def aggregate_daily_loads(trips):
+    """Build unsaved ``DailyLoad`` rows from a queryset of trips."""
+    rows = (
+        trips.annotate(date=TruncDate("departure_time"))
+        .order_by()
+        .values("route", "date", "train__train_type")
+        .annotate(
+            trip_count=Count("id"),
+            seat_count=Sum(
+                F("train__cargo_num") * F("train__places_in_cargo")
+            ),
+            sold=Sum("tickets_sold"),
+        )
+    )
+    return [
+        DailyLoad(
+            route_id=row["route"],
+            date=row["date"],
+            train_type_id=row["train__train_type"],
+            trips=row["trip_count"],
+            seats=row["seat_count"],
+            tickets_sold=row["sold"],
+        )
+        for row in rows
+    ]
+
+
+def lock_trip_rows(trips):
+    """Row-lock ``trips`` in ascending id order, as bookings do.
+
+    Bookings update a trip's counter before its rollup, so once the
+    trips are locked no sale can land between reading their counters
+    and rewriting the rollups.
+    """
+    return list(
+        trips.select_for_update().order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def rebuild_daily_loads(batch_size=5000):
+    """Recompute every rollup row from the trips."""
+    with transaction.atomic():
+        lock_trip_rows(Trip.objects.all())
+        DailyLoad.objects.all().delete()
+        return DailyLoad.objects.bulk_create(
+            aggregate_daily_loads(Trip.objects.all()), batch_size=batch_size
+        )
+
+
+def refresh_daily_loads(keys):
+    """Recompute the rollup rows of ``(route_id, date)`` keys."""
+    keys = set(keys)
+    if not keys:
+        return
+    routes = {route for route, _ in keys}
+    first = min(date for _, date in keys)
+    last = max(date for _, date in keys)
+    trips = Trip.objects.filter(
+        route__in=routes,
+        departure_time__gte=day_bounds(first)[0],
+        departure_time__lt=day_bounds(last)[1],
+    )
+
+    with transaction.atomic():
+        lock_trip_rows(trips)
+        rows = aggregate_daily_loads(trips)
+        stale = DailyLoad.objects.filter(
+            route__in=routes, date__range=(first, last)
+        ).values_list("pk", "route", "date")
+        DailyLoad.objects.filter(
+            pk__in=[pk for pk, route, date in stale if (route, date) in keys]
+        ).delete()
+        DailyLoad.objects.bulk_create(
+            row for row in rows if (row.route_id, row.date) in keys
+        )
+
+
+def record_tickets_sold(counts):
+    """Shift the rollups by ``{trip_id: delta}`` sold tickets."""
+    if not counts:
+        return
+    deltas = Counter()
+    trips = Trip.objects.filter(pk__in=counts).values_list(
+        "pk", "route", "departure_time", "train__train_type"
+    )
+    for trip_id, route_id, departure_time, train_type_id in trips:
+        route_id, date = daily_load_key(route_id, departure_time)
+        deltas[route_id, date, train_type_id] += counts[trip_id]
+
+    for (route_id, date, train_type_id), delta in deltas.items():
+        if delta:
+            DailyLoad.objects.filter(
+                route=route_id, date=date, train_type=train_type_id
+            ).update(tickets_sold=F("tickets_sold") + delta)
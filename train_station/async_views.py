@@ -0,0 +1,177 @@
+"""Async versions of the trip list, detail and seat map endpoints.
+
+DRF views are synchronous, so these run the ``TripViewSet`` request
+pipeline (authentication, permissions, throttling, pagination and
+rendering) in a worker thread. The lookups are awaited in between: the
+train, source and destination name filters do not depend on each other
+and are resolved concurrently, each fetching its ids in a thread of its
+own. Seat availability is an annotation of the trip query itself, so it
+is not a lookup of its own.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import close_old_connections, connections
+from django.http import Http404
+from rest_framework.response import Response
+
+from train_station.filters import filter_trips, match_trip_names
+from train_station.models import Trip
+from train_station.seats import get_seat_map, seat_map_cache_key
+from train_station.serializers import TRIP_LIST_PROJECTION
+from train_station.views import TripViewSet
+from train_station_service.metrics import current, serialize_started
+
+NAME_FILTERS = ("train", "source", "destination")
+
+
+def _isolated(func, metrics):
+    def run():
+        try:
+            if metrics is None:
+                return func()
+            with connections["default"].execute_wrapper(metrics):
+                return func()
+        finally:
+            close_old_connections()
+
+    return run
+
+
+async def concurrently(*funcs):
+    """Run independent blocking calls at the same time.
+
+    Django's async ORM sends every query of a request to one shared
+    thread, so ``asyncio.gather`` over it still runs them one by one.
+    Each call here gets a thread, and so a database connection, of its
+    own.
+    """
+    metrics = current.get()
+    return await asyncio.gather(
+        *(
+            sync_to_async(_isolated(func, metrics), thread_sensitive=False)()
+            for func in funcs
+        )
+    )
+
+
+def resolve_name_filter(name, value):
+    """Ids matching one name filter, fetched in the calling thread.
+
+    The lookups may return lazy querysets, which would otherwise only
+    run later as subqueries of the trip query.
+    """
+    return {
+        param: list(ids)
+        for param, ids in match_trip_names({name: value}).items()
+    }
+
+
+class AsyncTripView:
+    """Drives a ``TripViewSet`` instance through one request."""
+
+    def __init__(self, request, action, **kwargs):
+        self.request = request
+        self.view = TripViewSet(
+            action_map={"get": action},
+            args=(),
+            kwargs=kwargs,
+            format_kwarg=None,
+        )
+
+    async def initial(self):
+        """Authenticate and check the request; a response means refusal."""
+        return await sync_to_async(self._initial)()
+
+    async def respond(self, func, *args):
+        return await sync_to_async(self._respond)(func, *args)
+
+    def _initial(self):
+        view = self.view
+        view.request = view.initialize_request(self.request, **view.kwargs)
+        view.headers = view.default_response_headers
+        try:
+            view.initial(view.request, **view.kwargs)
+        except Exception as exc:
+            return self._finalize(view.handle_exception(exc))
+        return None
+
+    def _respond(self, func, *args):
+        # What was awaited since ``initial`` is not serialization.
+        self.view.serialize_mark = serialize_started()
+        try:
+            response = func(*args)
+        except Exception as exc:
+            response = self.view.handle_exception(exc)
+        return self._finalize(response)
+
+    def _finalize(self, response):
+        view = self.view
+        response = view.finalize_response(view.request, response)
+        return response.render()
+
+    def page(self, matches):
+        view = self.view
+        queryset = filter_trips(
+            view.queryset, view.request.query_params, matches
+        )
+        page = view.paginate_queryset(TRIP_LIST_PROJECTION.values(queryset))
+        return view.get_paginated_response(
+            TRIP_LIST_PROJECTION.serialize(page)
+        )
+
+    def detail(self, trip):
+        if trip is None:
+            raise Http404
+        return Response(self.view.get_serializer(trip).data)
+
+    def seats(self, seat_map):
+        if seat_map is None:
+            raise Http404
+        return Response(seat_map)
+
+
+async def trip_list(request):
+    trips = AsyncTripView(request, "list")
+    response = await trips.initial()
+    if response is not None:
+        return response
+
+    params = trips.view.request.query_params
+    matches = {}
+    for match in await concurrently(
+        *(
+            lambda name=name: resolve_name_filter(name, params[name])
+            for name in NAME_FILTERS
+            if params.get(name)
+        )
+    ):
+        matches.update(match)
+    return await trips.respond(trips.page, matches)
+
+
+async def trip_detail(request, pk):
+    trips = AsyncTripView(request, "retrieve", pk=pk)
+    response = await trips.initial()
+    if response is not None:
+        return response
+
+    try:
+        trip = await trips.view.queryset.aget(pk=pk)
+    except Trip.DoesNotExist:
+        trip = None
+    return await trips.respond(trips.detail, trip)
+
+
+async def trip_seats(request, pk):
+    trips = AsyncTripView(request, "seats", pk=pk)
+    response = await trips.initial()
+    if response is not None:
+        return response
+
+    seat_map = await cache.aget(seat_map_cache_key(pk))
+    if seat_map is None:
+        seat_map = await sync_to_async(get_seat_map)(pk)
+    return await trips.respond(trips.seats, seat_map)
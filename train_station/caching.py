@@ -0,0 +1,107 @@
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from train_station.distances import distance_matrix
+from train_station.geo import station_grid
+from train_station.journeys import timetable
+from train_station.models import Route, Station, Train, TrainType
+from train_station.search import station_names, train_names
+from train_station.snapshots import bump_version, get_version
+from train_station_service.replicas import use_primary
+
+RESPONSE_CACHE_KEY = "train-station:response:{}"
+
+
+def response_version_name(model):
+    return f"responses:{model._meta.label_lower}"
+
+
+def invalidate_responses(model):
+    """Publish a new version of every response built from ``model``."""
+    name = response_version_name(model)
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def invalidate_network():
+    """Drop every in-memory and cached view of stations, trains and trips.
+
+    For bulk writes, which bypass the model signals.
+    """
+    station_names.invalidate()
+    station_grid.invalidate()
+    distance_matrix.invalidate()
+    train_names.invalidate()
+    timetable.invalidate()
+    for model in (Station, Train, TrainType, Route):
+        invalidate_responses(model)
+
+
+class CachedResponseMixin:
+    """Cache response data of read-mostly viewsets.
+
+    Responses are keyed on the endpoint, the query string, the accepted
+    media type and the versions of ``cache_models``, so saving or
+    deleting any of those models moves every key at once and stale
+    entries simply expire. The key digest doubles as the ``ETag``, which
+    lets a matching ``If-None-Match`` be answered with 304 without
+    touching the cached body.
+    """
+
+    cache_models = ()
+
+    def get_response_cache_key(self, request):
+        versions = ":".join(
+            str(get_version(response_version_name(model)))
+            for model in self.cache_models
+        )
+        identity = "|".join(
+            (
+                request.path,
+                request.GET.urlencode(),
+                request.accepted_media_type,
+                versions,
+            )
+        )
+        return sha1(identity.encode()).hexdigest()
+
+    def cached_response(self, view, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        etag = f'"{key}"'
+        headers = {"ETag": etag}
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if "*" in etags or etag in etags:
+                return Response(
+                    status=status.HTTP_304_NOT_MODIFIED, headers=headers
+                )
+
+        cache_key = RESPONSE_CACHE_KEY.format(key)
+        data = cache.get(cache_key)
+        if data is None:
+            # The key already carries the new versions, so a lagging
+            # replica must not fill it.
+            with use_primary():
+                response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(cache_key, data, settings.RESPONSE_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
+
+
+class CachedListMixin(CachedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
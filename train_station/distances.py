@@ -0,0 +1,288 @@
+"""All-pairs shortest distances over the route graph.
+
+The matrix covers every station that has a route. It is computed with a
+vectorized Floyd-Warshall and stored as three ``.npy`` files: the sorted
+station ids (int64), the distances in kilometres and the next hop of
+every shortest path, both ``int32`` in row-major order with ``-1`` for
+unreachable pairs. Processes memory-map the files instead of loading
+them, so the pages are shared and only the rows that are read are
+touched.
+
+The matrix is never computed in a request. Route changes bump the shared
+``distance-matrix`` version once they commit and start a rebuild in a
+background thread of the process that made them; the
+``build_distance_matrix`` command builds it after deploys. Each build
+records the version it saw, goes to a directory of its own and is
+published by replacing the ``CURRENT`` file next to it, so every process
+maps the same build on its next lookup. One build runs at a time across
+processes, and the builder checks the version again when it is done.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from train_station.models import Route
+from train_station.snapshots import bump_version, get_version
+
+UNREACHABLE = -1
+MATRIX_FILES = ("stations", "distances", "next_hops")
+BUILD_LOCK_KEY = "train-station:distance-matrix:building"
+# Long enough for any build; frees the lock of a process that died.
+BUILD_LOCK_TIMEOUT = 600
+
+
+def compute_distance_matrix(routes):
+    """Return station ids, distances and next hops of ``routes``.
+
+    ``routes`` holds ``(source_id, destination_id, distance)`` triples.
+    """
+    routes = np.array(list(routes), dtype=np.int64).reshape(-1, 3)
+    sources, destinations, lengths = routes.T
+    stations = np.unique(routes[:, :2])
+    size = len(stations)
+    rows = np.searchsorted(stations, sources)
+    columns = np.searchsorted(stations, destinations)
+
+    # Sums of two finite distances must stay below int32 overflow, which
+    # leaves a billion kilometres for the longest shortest path.
+    infinity = np.iinfo(np.int32).max // 2
+    if lengths.max(initial=0) >= infinity:
+        raise ValueError("Route distances overflow the int32 matrix.")
+    distances = np.full((size, size), infinity, dtype=np.int32)
+    next_hops = np.full((size, size), UNREACHABLE, dtype=np.int32)
+    # Assign the longest edges first so the shortest of parallel ones wins.
+    order = np.argsort(-lengths, kind="stable")
+    distances[rows[order], columns[order]] = lengths[order]
+    next_hops[rows, columns] = columns
+    diagonal = np.arange(size)
+    distances[diagonal, diagonal] = 0
+    next_hops[diagonal, diagonal] = diagonal
+
+    shorter = np.empty((size, size), dtype=bool)
+    through = np.empty((size, size), dtype=np.int32)
+    for k in range(size):
+        np.add(distances[:, k, None], distances[None, k, :], out=through)
+        np.minimum(through, infinity, out=through)
+        np.less(through, distances, out=shorter)
+        np.copyto(distances, through, where=shorter)
+        np.copyto(
+            next_hops,
+            np.broadcast_to(next_hops[:, k, None], (size, size)),
+            where=shorter,
+        )
+
+    distances[distances == infinity] = UNREACHABLE
+    return stations, distances, next_hops
+
+
+class DistanceMatrix:
+    """Memory-mapped distance and next-hop matrices."""
+
+    def __init__(self, stations, distances, next_hops):
+        self.stations = stations
+        self.distances = distances
+        self.next_hops = next_hops
+
+    def __len__(self):
+        return len(self.stations)
+
+    @classmethod
+    def load(cls, directory):
+        return cls(
+            *(
+                np.load(Path(directory) / f"{name}.npy", mmap_mode="r")
+                for name in MATRIX_FILES
+            )
+        )
+
+    @staticmethod
+    def save(directory, arrays):
+        """Write the arrays to ``directory`` in one atomic rename."""
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=directory.parent, prefix=".build-")
+        for name, array in zip(MATRIX_FILES, arrays):
+            np.save(Path(staging) / f"{name}.npy", array)
+        os.rename(staging, directory)
+
+    def index(self, station_id):
+        position = int(np.searchsorted(self.stations, station_id))
+        if (
+            position < len(self.stations)
+            and self.stations[position] == station_id
+        ):
+            return position
+        return None
+
+    def lookup(self, source_id, destination_id):
+        """Distance and station ids of the shortest path, if there is one."""
+        source = self.index(source_id)
+        destination = self.index(destination_id)
+        if source is None or destination is None:
+            return None, []
+        distance = int(self.distances[source, destination])
+        if distance == UNREACHABLE:
+            return None, []
+
+        path = [source]
+        while path[-1] != destination and len(path) <= len(self):
+            path.append(int(self.next_hops[path[-1], destination]))
+        return distance, [int(self.stations[index]) for index in path]
+
+
+class DistanceMatrixUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Route distances have not been computed yet."
+    default_code = "distance_matrix_unavailable"
+
+
+class PublishedDistanceMatrix:
+    """The build last published to ``DISTANCE_MATRIX_DIR``."""
+
+    version_name = "distance-matrix"
+    current_file = "CURRENT"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build = None
+        self._matrix = None
+        self._builder = None
+        self._rebuild_pending = False
+
+    @property
+    def root(self):
+        return Path(settings.DISTANCE_MATRIX_DIR)
+
+    def current(self):
+        """Directory name and route version of the published build."""
+        try:
+            build, version = (
+                (self.root / self.current_file).read_text().split()
+            )
+        except FileNotFoundError:
+            return None, None
+        return build, int(version)
+
+    def get(self):
+        """The published matrix, or ``None`` before the first build."""
+        build, _ = self.current()
+        if build is None:
+            return None
+        with self._lock:
+            if build != self._build:
+                self._matrix = DistanceMatrix.load(self.root / build)
+                self._build = build
+            return self._matrix
+
+    def invalidate(self):
+        """Mark the published build stale once the transaction commits,
+        and rebuild it in the background."""
+        transaction.on_commit(self._changed)
+
+    def _changed(self):
+        bump_version(self.version_name)
+        if settings.DISTANCE_MATRIX_REBUILD_ON_CHANGE:
+            self.schedule_rebuild()
+
+    def is_current(self):
+        return self.current()[1] == get_version(self.version_name)
+
+    def schedule_rebuild(self):
+        """Run ``rebuild`` in a background thread of this process.
+
+        Changes that come in while the thread runs make it go again
+        instead of starting another one. Returns the thread.
+        """
+        with self._lock:
+            self._rebuild_pending = True
+            if self._builder is None:
+                self._builder = threading.Thread(
+                    target=self._run_builder,
+                    name="distance-matrix-builder",
+                    daemon=True,
+                )
+                self._builder.start()
+            return self._builder
+
+    def _run_builder(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._rebuild_pending:
+                        self._builder = None
+                        return
+                    self._rebuild_pending = False
+                self.rebuild()
+        finally:
+            connections.close_all()
+
+    @contextmanager
+    def build_lock(self):
+        """Yield whether this process may build, holding it if so."""
+        acquired = cache.add(BUILD_LOCK_KEY, True, BUILD_LOCK_TIMEOUT)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cache.delete(BUILD_LOCK_KEY)
+
+    def rebuild(self):
+        """Build until the published build is current.
+
+        Gives up while another process builds: that one checks the
+        version again once it has published.
+        """
+        while not self.is_current():
+            with self.build_lock() as acquired:
+                if not acquired:
+                    return
+                self.build()
+
+    def build(self):
+        """Compute, publish and return the matrix of the current routes."""
+        # Read the version first: a change made during the build leaves
+        # the published build stale.
+        version = get_version(self.version_name)
+        arrays = compute_distance_matrix(
+            Route.objects.values_list(
+                "source_id", "destination_id", "distance"
+            )
+        )
+        previous, _ = self.current()
+        build = str(time.time_ns())
+        DistanceMatrix.save(self.root / build, arrays)
+
+        staging = self.root / f".{self.current_file}-{build}"
+        staging.write_text(f"{build} {version}\n")
+        os.replace(staging, self.root / self.current_file)
+
+        # Processes may still be loading the previous build.
+        for stale in self.root.iterdir():
+            if stale.name.isdigit() and stale.name not in (build, previous):
+                shutil.rmtree(stale, ignore_errors=True)
+        return DistanceMatrix(*arrays)
+
+
+distance_matrix = PublishedDistanceMatrix()
+
+
+def shortest_path(source_id, destination_id):
+    """Distance, station ids of the path and whether routes have changed
+    since the matrix was built."""
+    matrix = distance_matrix.get()
+    if matrix is None:
+        raise DistanceMatrixUnavailable()
+    distance, path = matrix.lookup(source_id, destination_id)
+    return distance, path, not distance_matrix.is_current()
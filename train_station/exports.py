@@ -0,0 +1,89 @@
+import csv
+import json
+from datetime import datetime
+
+from django.db import router
+
+from train_station.models import Ticket
+
+# (column, lookup) pairs of a ticket export row.
+TICKET_COLUMNS = (
+    ("ticket_id", "id"),
+    ("order_id", "order_id"),
+    ("ordered_at", "order__created_at"),
+    ("user_email", "order__user__email"),
+    ("trip_id", "trip_id"),
+    ("departure_time", "trip__departure_time"),
+    ("arrival_time", "trip__arrival_time"),
+    ("source", "trip__route__source__name"),
+    ("destination", "trip__route__destination__name"),
+    ("distance", "trip__route__distance"),
+    ("train", "trip__train__name"),
+    ("train_type", "trip__train__train_type__name"),
+    ("cargo", "cargo"),
+    ("seat", "seat"),
+)
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_FORMATS = tuple(EXPORT_CONTENT_TYPES)
+CHUNK_SIZE = 2000
+
+
+def ticket_rows(start, end, chunk_size=CHUNK_SIZE):
+    """Tickets of orders created in ``[start, end)`` as plain tuples.
+
+    Rows come from a chunked, server-side cursor where the database
+    supports one, so memory use does not depend on the export size. The
+    database is picked now: a streamed response reads the rows after
+    the request's replica has been released.
+    """
+    return (
+        Ticket.objects.using(router.db_for_read(Ticket))
+        .filter(order__created_at__gte=start, order__created_at__lt=end)
+        .order_by("order_id", "id")
+        .values_list(*(lookup for _, lookup in TICKET_COLUMNS))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow([column for column, _ in TICKET_COLUMNS])]
+    for row in rows:
+        lines.append(writer.writerow([_plain(value) for value in row]))
+        if len(lines) >= chunk_size:
+            yield "".join(lines)
+            lines = []
+    yield "".join(lines)
+
+
+def ndjson_lines(rows, chunk_size=CHUNK_SIZE):
+    columns = [column for column, _ in TICKET_COLUMNS]
+    lines = []
+    for row in rows:
+        record = dict(zip(columns, map(_plain, row)))
+        lines.append(json.dumps(record) + "\n")
+        if len(lines) >= chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def export_tickets(start, end, output="csv"):
+    """Yield text chunks of the ticket export in ``output`` format."""
+    rows = ticket_rows(start, end)
+    if output == "ndjson":
+        return ndjson_lines(rows)
+    return csv_lines(rows)
@@ -0,0 +1,117 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from train_station.models import Route
+from train_station.search import match_stations, match_trains
+
+
+def day_bounds(date):
+    """Half-open ``[start, end)`` datetimes of a day in the current zone."""
+    start = timezone.make_aware(datetime.combine(date, time.min))
+    end = timezone.make_aware(
+        datetime.combine(date + timedelta(days=1), time.min)
+    )
+    return start, end
+
+
+def parse_date_param(name, value):
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValidationError({name: "Expected a date in YYYY-MM-DD format."})
+    return date
+
+
+def parse_datetime_param(name, value):
+    """Parse an ISO datetime, or a bare date meaning the start of that day."""
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        return day_bounds(parse_date_param(name, value))[0]
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def match_trip_names(params):
+    """Resolve the ``train``/``source``/``destination`` name filters.
+
+    Returns ``{param: ids}`` for the parameters present, each lookup
+    being independent of the others.
+    """
+    lookups = {
+        "train": match_trains,
+        "source": match_stations,
+        "destination": match_stations,
+    }
+    return {
+        name: lookup(params[name])
+        for name, lookup in lookups.items()
+        if params.get(name)
+    }
+
+
+def filter_trips(queryset, params, matches=None):
+    """Apply the trip list query parameters to ``queryset``.
+
+    ``matches`` are the resolved name filters of ``match_trip_names``;
+    they are resolved here when not given.
+    """
+    if matches is None:
+        matches = match_trip_names(params)
+    departure_date = params.get("departure")
+    arrival_date = params.get("arrival")
+    departure_after = params.get("departure_after")
+    departure_before = params.get("departure_before")
+
+    if "train" in matches:
+        queryset = queryset.filter(train_id__in=matches["train"])
+
+    if "source" in matches:
+        queryset = queryset.filter(
+            route_id__in=Route.objects.filter(
+                source_id__in=matches["source"]
+            ).values("id")
+        )
+
+    if "destination" in matches:
+        queryset = queryset.filter(
+            route_id__in=Route.objects.filter(
+                destination_id__in=matches["destination"]
+            ).values("id")
+        )
+
+    if departure_date:
+        start, end = day_bounds(parse_date_param("departure", departure_date))
+        queryset = queryset.filter(
+            departure_time__gte=start, departure_time__lt=end
+        )
+
+    if arrival_date:
+        start, end = day_bounds(parse_date_param("arrival", arrival_date))
+        queryset = queryset.filter(
+            arrival_time__gte=start, arrival_time__lt=end
+        )
+
+    if departure_after:
+        queryset = queryset.filter(
+            departure_time__gte=parse_datetime_param(
+                "departure_after", departure_after
+            )
+        )
+
+    if departure_before:
+        queryset = queryset.filter(
+            departure_time__lt=parse_datetime_param(
+                "departure_before", departure_before
+            )
+        )
+
+    return queryset
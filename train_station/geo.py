@@ -0,0 +1,129 @@
+"""Nearest-station lookups over an in-memory grid of station positions.
+
+Stations are bucketed into cells of ``GRID_CELL_DEGREES`` and kept in
+numpy arrays sorted by cell, so a search reads the rows of the cells
+around the query point with one ``searchsorted`` per cell row and
+measures them with a vectorized haversine.
+"""
+
+import math
+
+import numpy as np
+
+from train_station.models import Station
+from train_station.snapshots import LocalSnapshot
+
+EARTH_RADIUS_KM = 6371.0088
+GRID_CELL_DEGREES = 0.25
+GRID_COLUMNS = round(360 / GRID_CELL_DEGREES)
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distances from one point to arrays of points."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    h = (
+        np.sin((lats - lat) / 2) ** 2
+        + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+def cell_row(lat):
+    return math.floor((lat + 90) / GRID_CELL_DEGREES)
+
+
+def cell_column(lon):
+    return math.floor((lon + 180) / GRID_CELL_DEGREES) % GRID_COLUMNS
+
+
+class StationGrid:
+    """Station ids, names and positions ordered by grid cell."""
+
+    def __init__(self, rows):
+        rows = list(rows)
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        lats = np.array([row[2] for row in rows], dtype=np.float64)
+        lons = np.array([row[3] for row in rows], dtype=np.float64)
+        cells = np.floor((lats + 90) / GRID_CELL_DEGREES).astype(np.int64)
+        columns = np.floor((lons + 180) / GRID_CELL_DEGREES).astype(np.int64)
+        cells = cells * GRID_COLUMNS + columns % GRID_COLUMNS
+
+        order = np.argsort(cells, kind="stable")
+        self.cells = cells[order]
+        self.ids = ids[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.names = [rows[index][1] for index in order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearby(self, lat, lon, radius_km, limit):
+        """Up to ``limit`` stations within ``radius_km``, nearest first."""
+        candidates = self.candidates(lat, lon, radius_km)
+        distances = haversine_km(
+            lat, lon, self.lats[candidates], self.lons[candidates]
+        )
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        if len(distances) > limit:
+            nearest = np.argpartition(distances, limit - 1)[:limit]
+            candidates, distances = candidates[nearest], distances[nearest]
+        order = np.argsort(distances, kind="stable")
+        return [
+            {
+                "id": int(self.ids[index]),
+                "name": self.names[index],
+                "latitude": float(self.lats[index]),
+                "longitude": float(self.lons[index]),
+                "distance_km": round(float(distance), 3),
+            }
+            for index, distance in zip(candidates[order], distances[order])
+        ]
+
+    def candidates(self, lat, lon, radius_km):
+        """Positions of the stations in the cells a search circle touches."""
+        span = math.degrees(radius_km / EARTH_RADIUS_KM)
+        south, north = max(lat - span, -90), min(lat + span, 90)
+        # Meridians converge, so the widest band is at the highest latitude.
+        widest = math.cos(math.radians(max(abs(south), abs(north))))
+        if widest <= 0 or span / widest >= 180:
+            columns = [(0, GRID_COLUMNS - 1)]
+        else:
+            west = cell_column(lon - span / widest)
+            east = cell_column(lon + span / widest)
+            columns = (
+                [(west, east)]
+                if west <= east
+                else [(west, GRID_COLUMNS - 1), (0, east)]
+            )
+
+        rows = range(cell_row(south), cell_row(north) + 1)
+        ranges = [
+            (row * GRID_COLUMNS + first, row * GRID_COLUMNS + last + 1)
+            for row in rows
+            for first, last in columns
+        ]
+        starts = np.searchsorted(self.cells, [start for start, _ in ranges])
+        ends = np.searchsorted(self.cells, [end for _, end in ranges])
+        return np.concatenate(
+            [np.arange(start, end) for start, end in zip(starts, ends)]
+            or [np.empty(0, dtype=np.int64)]
+        )
+
+
+class StationGridSnapshot(LocalSnapshot):
+    version_name = "station-grid"
+
+    def build(self):
+        return StationGrid(
+            Station.objects.values_list("id", "name", "latitude", "longitude")
+        )
+
+
+station_grid = StationGridSnapshot()
+
+
+def nearby_stations(lat, lon, radius_km, limit):
+    return station_grid.get().nearby(lat, lon, radius_km, limit)
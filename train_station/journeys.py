@@ -0,0 +1,172 @@
+from bisect import bisect_left
+from datetime import timedelta
+from math import inf
+
+from django.conf import settings
+from django.utils import timezone
+
+from train_station.models import Trip
+from train_station.snapshots import LocalSnapshot
+
+
+class Timetable:
+    """Trips as elementary connections sorted by departure time.
+
+    ``keys`` holds ``(departure, trip_id)`` pairs for bisection and
+    ``connections`` the matching ``(source, destination, arrival)``
+    tuples; times are POSIX timestamps.
+    """
+
+    def __init__(self, rows=()):
+        self.keys = []
+        self.connections = []
+        self.departures = {}
+        for trip_id, source, destination, departure, arrival in sorted(
+            rows, key=lambda row: (row[3], row[0])
+        ):
+            self.keys.append((departure, trip_id))
+            self.connections.append((source, destination, arrival))
+            self.departures[trip_id] = departure
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, trip_id, source, destination, departure, arrival):
+        self.remove(trip_id)
+        index = bisect_left(self.keys, (departure, trip_id))
+        self.keys.insert(index, (departure, trip_id))
+        self.connections.insert(index, (source, destination, arrival))
+        self.departures[trip_id] = departure
+
+    def remove(self, trip_id):
+        departure = self.departures.pop(trip_id, None)
+        if departure is None:
+            return
+        index = bisect_left(self.keys, (departure, trip_id))
+        del self.keys[index]
+        del self.connections[index]
+
+    def plan(
+        self,
+        source,
+        destination,
+        departure,
+        min_transfer=0,
+        max_transfers=3,
+        horizon=86400,
+    ):
+        """Connection scan for earliest arrival and fewest transfers.
+
+        For every reached station the scan keeps ``best[k]``, the earliest
+        arrival using at most ``k`` trips, so a single pass over the
+        connections departing in ``[departure, departure + horizon]``
+        yields the whole arrival/transfer Pareto front at the
+        destination. Returns the ``earliest_arrival`` and
+        ``fewest_transfers`` journeys, each a list of
+        ``(trip_id, source, destination, departure, arrival)`` legs.
+        """
+        if source == destination:
+            return {}
+
+        max_legs = max_transfers + 1
+        best = {source: [departure] * (max_legs + 1)}
+        parents = {}
+        target = None
+        keys, connections = self.keys, self.connections
+        end = departure + horizon
+
+        for index in range(bisect_left(keys, (departure,)), len(keys)):
+            dep = keys[index][0]
+            if dep > end or target is not None and dep >= target[1]:
+                break
+            src, dst, arr = connections[index]
+            labels = best.get(src)
+            if labels is None:
+                continue
+
+            for legs in range(max_legs):
+                if labels[legs] + (min_transfer if legs else 0) <= dep:
+                    break
+            else:
+                continue
+
+            reached = best.get(dst)
+            if reached is None:
+                reached = best[dst] = [inf] * (max_legs + 1)
+            for total in range(legs + 1, max_legs + 1):
+                if arr >= reached[total]:
+                    break
+                reached[total] = arr
+                parents[dst, total] = (index, legs + 1)
+            if dst == destination:
+                target = reached
+
+        if target is None:
+            return {}
+
+        fewest = next(legs for legs, arr in enumerate(target) if arr < inf)
+        earliest = target.index(target[max_legs])
+        return {
+            "earliest_arrival": self._unwind(parents, destination, earliest),
+            "fewest_transfers": self._unwind(parents, destination, fewest),
+        }
+
+    def _unwind(self, parents, station, legs):
+        journey = []
+        while legs:
+            index, legs = parents[station, legs]
+            departure, trip_id = self.keys[index]
+            src, dst, arrival = self.connections[index]
+            journey.append((trip_id, src, dst, departure, arrival))
+            station, legs = src, legs - 1
+        journey.reverse()
+        return journey
+
+
+class TimetableSnapshot(LocalSnapshot):
+    version_name = "timetable"
+
+    def build(self):
+        since = timezone.now() - timedelta(days=1)
+        rows = Trip.objects.filter(arrival_time__gte=since).values_list(
+            "id",
+            "route__source_id",
+            "route__destination_id",
+            "departure_time",
+            "arrival_time",
+        )
+        return Timetable(
+            (trip_id, src, dst, dep.timestamp(), arr.timestamp())
+            for trip_id, src, dst, dep, arr in rows.iterator(chunk_size=5000)
+        )
+
+    def save_trip(self, trip):
+        row = (
+            trip.pk,
+            trip.route.source_id,
+            trip.route.destination_id,
+            trip.departure_time.timestamp(),
+            trip.arrival_time.timestamp(),
+        )
+        self.update(lambda timetable: timetable.add(*row))
+
+    def delete_trip(self, trip_id):
+        self.update(lambda timetable: timetable.remove(trip_id))
+
+
+timetable = TimetableSnapshot()
+
+
+def plan_journeys(
+    source, destination, departure, min_transfer=None, max_transfers=3
+):
+    if min_transfer is None:
+        min_transfer = settings.JOURNEY_MIN_TRANSFER
+    return timetable.get().plan(
+        source,
+        destination,
+        departure.timestamp(),
+        min_transfer=min_transfer.total_seconds(),
+        max_transfers=max_transfers,
+        horizon=settings.JOURNEY_SEARCH_HORIZON.total_seconds(),
+    )
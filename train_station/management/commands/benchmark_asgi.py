@@ -0,0 +1,177 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Outside INTERNAL_IPS, so the debug toolbar stays out of the measurements.
+CLIENT_ADDR = "192.0.2.1"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of concurrent clients searching trips "
+        "through the WSGI handler (sync views, one thread per client) and "
+        "the ASGI handler (sync and async views, one event loop). Runs "
+        "against the current database with throttling disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=32)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--query",
+            default="",
+            help="Trip list query string, ex. source=lviv&destination=kyiv",
+        )
+        parser.add_argument(
+            "--output", help="Also write the results to this JSON file."
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(
+            email="asgi-benchmark@train-station.local"
+        )
+        self.authorization = (
+            f"Bearer {RefreshToken.for_user(user).access_token}"
+        )
+        sync_url = reverse("train-station:trip-list")
+        async_url = reverse("train-station:trip-list-async")
+        query = options["query"]
+
+        try:
+            with mock.patch.object(APIView, "throttle_classes", ()):
+                results = [
+                    self.run("wsgi", "sync", sync_url, query, options),
+                    self.run("asgi", "sync", sync_url, query, options),
+                    self.run("asgi", "async", async_url, query, options),
+                ]
+        finally:
+            user.delete()
+
+        for result in results:
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{result['server']}/{result['view']}: "
+                f"{result['throughput']:.1f} req/s, "
+                f"p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, "
+                f"p99 {latency['p99']:.2f} ms, {result['errors']} errors"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+
+    def run(self, server, view, path, query, options):
+        call = self.wsgi_calls if server == "wsgi" else self.asgi_calls
+        call(path, query, options["warmup"], options["clients"])
+        started = time.perf_counter()
+        calls = call(path, query, options["requests"], options["clients"])
+        elapsed = time.perf_counter() - started
+
+        timings = [duration for duration, _ in calls]
+        cuts = statistics.quantiles(timings, n=100, method="inclusive")
+        return {
+            "server": server,
+            "view": view,
+            "path": path,
+            "query": query,
+            "clients": options["clients"],
+            "requests": len(calls),
+            "errors": sum(status != 200 for _, status in calls),
+            "throughput": len(calls) / elapsed,
+            "latency_ms": {
+                "p50": cuts[49],
+                "p95": cuts[94],
+                "p99": cuts[98],
+            },
+        }
+
+    def wsgi_calls(self, path, query, count, clients):
+        """``(duration_ms, status)`` of requests from a thread pool."""
+        application = get_wsgi_application()
+
+        def call(_):
+            environ = {
+                "PATH_INFO": path,
+                "QUERY_STRING": query,
+                "REMOTE_ADDR": CLIENT_ADDR,
+                "HTTP_HOST": "localhost",
+                "HTTP_AUTHORIZATION": self.authorization,
+            }
+            setup_testing_defaults(environ)
+            status = []
+            started = time.perf_counter()
+            body = application(
+                environ, lambda line, headers: status.append(line)
+            )
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            duration = (time.perf_counter() - started) * 1000
+            return duration, int(status[0].split()[0])
+
+        with ThreadPoolExecutor(clients) as pool:
+            return list(pool.map(call, range(count)))
+
+    def asgi_calls(self, path, query, count, clients):
+        """``(duration_ms, status)`` of requests from concurrent tasks."""
+        application = get_asgi_application()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"authorization", self.authorization.encode()),
+            ],
+            "client": (CLIENT_ADDR, 50000),
+            "server": ("localhost", 80),
+        }
+
+        async def call(limit):
+            received = asyncio.Event()
+            disconnected = asyncio.Event()
+            status = []
+
+            async def receive():
+                if not received.is_set():
+                    received.set()
+                    return {"type": "http.request", "body": b""}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+
+            async with limit:
+                started = time.perf_counter()
+                await application(dict(scope), receive, send)
+                duration = (time.perf_counter() - started) * 1000
+            disconnected.set()
+            return duration, status[0]
+
+        async def main():
+            limit = asyncio.Semaphore(clients)
+            return await asyncio.gather(*(call(limit) for _ in range(count)))
+
+        return asyncio.run(main())
@@ -0,0 +1,126 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from train_station.models import (
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the Count('tickets') availability aggregate with the "
+        "maintained Trip.tickets_sold counter. Synthetic data is created "
+        "inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=1_000_000)
+        parser.add_argument("--trips", type=int, default=1_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.populate(options)
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def populate(self, options):
+        trips_num = options["trips"]
+        per_trip = -(-options["tickets"] // trips_num)
+        places_in_cargo = 100
+        cargo_num = -(-per_trip // places_in_cargo)
+
+        source = Station.objects.create(
+            name="Bench A", latitude=0, longitude=0
+        )
+        destination = Station.objects.create(
+            name="Bench B", latitude=1, longitude=1
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=100
+        )
+        train = Train.objects.create(
+            name="Bench",
+            cargo_num=cargo_num,
+            places_in_cargo=places_in_cargo,
+            train_type=TrainType.objects.create(name="Bench"),
+        )
+        user = get_user_model().objects.create_user(
+            email="benchmark@train-station.local"
+        )
+        order = Order.objects.create(user=user)
+
+        start = timezone.now()
+        trips = Trip.objects.bulk_create(
+            Trip(
+                route=route,
+                train=train,
+                departure_time=start + timedelta(hours=i),
+                arrival_time=start + timedelta(hours=i + 2),
+                tickets_sold=per_trip,
+            )
+            for i in range(trips_num)
+        )
+
+        batch = []
+        created = 0
+        for trip in trips:
+            for place in range(per_trip):
+                if created == options["tickets"]:
+                    break
+                batch.append(
+                    Ticket(
+                        trip=trip,
+                        order=order,
+                        cargo=place // places_in_cargo + 1,
+                        seat=place % places_in_cargo + 1,
+                    )
+                )
+                created += 1
+                if len(batch) == options["batch_size"]:
+                    Ticket.objects.bulk_create(batch)
+                    batch = []
+        Ticket.objects.bulk_create(batch)
+
+        self.stdout.write(f"Created {trips_num} trips, {created} tickets.")
+
+    def run(self, options):
+        capacity = F("train__cargo_num") * F("train__places_in_cargo")
+        base = Trip.objects.select_related(
+            "route__source", "route__destination", "train__train_type"
+        ).order_by("departure_time", "id")
+        querysets = {
+            "count_aggregate": base.annotate(
+                tickets_available=capacity - Count("tickets")
+            ).distinct(),
+            "sold_counter": base.annotate(
+                tickets_available=capacity - F("tickets_sold")
+            ),
+        }
+
+        for name, queryset in querysets.items():
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                list(queryset[: options["page_size"]])
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{name}: median {statistics.median(timings):.2f} ms, "
+                f"max {max(timings):.2f} ms "
+                f"({options['repeat']} runs, page of {options['page_size']})"
+            )
@@ -0,0 +1,114 @@
+import statistics
+import threading
+import time
+
+import psycopg
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import ConnectionPool
+
+from train_station.models import Station
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare request throughput with a new PostgreSQL connection per "
+        "request against checkouts from a connection pool. Worker threads "
+        "run the query of a short station page per simulated request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=None,
+            help="Maximum pool size (default: the number of threads).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("This benchmark needs a PostgreSQL database.")
+        db = connection.settings_dict
+        self.conninfo = make_conninfo(
+            dbname=db["NAME"],
+            user=db["USER"],
+            password=db["PASSWORD"],
+            host=db["HOST"],
+            port=db["PORT"],
+        )
+        self.sql = (
+            f"SELECT id, name FROM {Station._meta.db_table} "
+            "ORDER BY id LIMIT 20"
+        )
+        size = options["pool_size"] or options["threads"]
+
+        direct = self.run(self.direct_request, options)
+        with ConnectionPool(
+            self.conninfo,
+            min_size=size,
+            max_size=size,
+            check=ConnectionPool.check_connection,
+        ) as pool:
+            pool.wait()
+            pooled = self.run(lambda: self.pooled_request(pool), options)
+            stats = pool.get_stats()
+
+        for name, result in (("per-request", direct), ("pooled", pooled)):
+            self.stdout.write(
+                f"{name:>12}: {result['throughput']:8.1f} req/s  "
+                f"p50 {result['p50']:6.2f} ms  p95 {result['p95']:6.2f} ms"
+            )
+        self.stdout.write(
+            f"pool: {stats.get('requests_num', 0)} checkouts, "
+            f"{stats.get('requests_wait_ms', 0)} ms waiting, "
+            f"{stats.get('connections_num', 0)} connections opened"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pooling is {pooled['throughput'] / direct['throughput']:.1f}"
+                "x the per-request throughput."
+            )
+        )
+
+    def direct_request(self):
+        with psycopg.connect(self.conninfo) as conn:
+            conn.execute(self.sql).fetchall()
+
+    def pooled_request(self, pool):
+        with pool.connection() as conn:
+            conn.execute(self.sql).fetchall()
+
+    def run(self, request, options):
+        """Spread the requests over the threads and time each one."""
+        per_thread = options["requests"] // options["threads"]
+        timings = []
+        lock = threading.Lock()
+
+        def worker():
+            local = []
+            for _ in range(per_thread):
+                started = time.perf_counter()
+                request()
+                local.append(time.perf_counter() - started)
+            with lock:
+                timings.extend(local)
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(options["threads"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        percentiles = statistics.quantiles(timings, n=100)
+        return {
+            "throughput": len(timings) / elapsed,
+            "p50": percentiles[49] * 1000,
+            "p95": percentiles[94] * 1000,
+        }
@@ -0,0 +1,286 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from train_station.models import (
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    Trip,
+)
+from train_station.urls import router
+
+# Outside INTERNAL_IPS, so the debug toolbar stays out of the measurements.
+CLIENT_ADDR = "192.0.2.1"
+PASSWORD = "benchmark-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure p50/p95/p99 latency, SQL query count and peak traced "
+        "memory of every router endpoint and the user endpoints against "
+        "the current database, and write the results as JSON. Requests "
+        "run inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            help="Only run endpoints whose name contains this text.",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write the JSON report to (default: stdout).",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.user = get_user_model().objects.create_superuser(
+                email="benchmark@train-station.local", password=PASSWORD
+            )
+            results = [
+                self.measure(name, method, url, data, options)
+                for name, method, url, data in self.endpoints()
+                if not options["only"]
+                or any(part in name for part in options["only"])
+            ]
+            transaction.set_rollback(True)
+
+        report = {
+            "commit": self.git_commit(),
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "dataset": {
+                model.__name__.lower(): model.objects.count()
+                for model in (Station, Route, Train, Trip, Order, Ticket)
+            },
+            "endpoints": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(output)
+        else:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+            self.stderr.write(f"Report written to {options['output']}")
+
+    def endpoints(self):
+        """Yield ``(name, method, url, data)`` for every endpoint."""
+        for prefix, viewset, basename in router.registry:
+            name = f"train-station:{basename}"
+            params = self.sample_params(basename)
+            if hasattr(viewset, "list"):
+                url = reverse(f"{name}-list")
+                yield f"{basename}-list", "get", url, params
+
+            queryset = getattr(viewset, "queryset", None)
+            pk = (
+                queryset.model.objects.order_by("pk")
+                .values_list("pk", flat=True)
+                .first()
+                if queryset is not None
+                else None
+            )
+            if hasattr(viewset, "retrieve") and pk is not None:
+                url = reverse(f"{name}-detail", args=[pk])
+                yield f"{basename}-detail", "get", url, None
+
+            for action in viewset.get_extra_actions():
+                if "get" not in action.mapping:
+                    continue
+                if action.detail and pk is None:
+                    continue
+                action_name = f"{basename}-{action.url_name}"
+                url = reverse(
+                    f"{name}-{action.url_name}",
+                    args=[pk] if action.detail else [],
+                )
+                yield action_name, "get", url, self.sample_params(action_name)
+
+        credentials = {"email": self.user.email, "password": PASSWORD}
+        refresh = RefreshToken.for_user(self.user)
+        yield "user-manage", "get", reverse("user:manage"), None
+        yield (
+            "user-token",
+            "post",
+            reverse("user:token_obtain_pair"),
+            credentials,
+        )
+        yield (
+            "user-token-refresh",
+            "post",
+            reverse("user:token_refresh"),
+            {"refresh": str(refresh)},
+        )
+        yield (
+            "user-token-verify",
+            "post",
+            reverse("user:token_verify"),
+            {"token": str(refresh.access_token)},
+        )
+
+    def sample_params(self, name):
+        if name == "station-autocomplete":
+            station = Station.objects.order_by("pk").first()
+            return {"q": station.name[:3] if station else "a"}
+        if name == "station-nearby":
+            station = Station.objects.order_by("pk").first()
+            if station is None:
+                return None
+            return {"lat": station.latitude, "lon": station.longitude}
+        if name == "route-distance":
+            route = Route.objects.order_by("pk").first()
+            if route is None:
+                return None
+            return {
+                "source": route.source_id,
+                "destination": route.destination_id,
+            }
+        if name == "order-export":
+            # The day of the latest order, a typical nightly export.
+            latest = Order.objects.order_by("created_at").last()
+            day = (
+                timezone.localdate(latest.created_at)
+                if latest
+                else timezone.localdate()
+            )
+            return {
+                "start": day.isoformat(),
+                "end": (day + timedelta(days=1)).isoformat(),
+            }
+        if name == "journey":
+            trip = (
+                Trip.objects.select_related("route")
+                .order_by("departure_time")
+                .first()
+            )
+            if trip is None:
+                return None
+            return {
+                "source": trip.route.source_id,
+                "destination": trip.route.destination_id,
+                "departure": trip.departure_time.isoformat(),
+            }
+        return None
+
+    def measure(self, name, method, url, data, options):
+        client = APIClient(SERVER_NAME="localhost", REMOTE_ADDR=CLIENT_ADDR)
+        token = RefreshToken.for_user(self.user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        def request():
+            if method == "get":
+                response = client.get(url, data)
+            else:
+                response = client.post(url, data, format="json")
+            if response.streaming:
+                # Streamed bodies are only produced while being read.
+                b"".join(response.streaming_content)
+            return response
+
+        for _ in range(options["warmup"]):
+            self.reset_throttles()
+            request()
+
+        timings, queries, statuses = [], [], Counter()
+        for _ in range(options["requests"]):
+            self.reset_throttles()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = request()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+            statuses[response.status_code] += 1
+
+        failed = sorted(code for code in statuses if not 200 <= code < 300)
+        if failed:
+            raise CommandError(
+                f"{name} answered {', '.join(map(str, failed))}; only "
+                "successful responses are benchmarked. Check its sample "
+                "parameters and the dataset."
+            )
+
+        # Measured apart from the timings, tracing slows Python down a lot.
+        self.reset_throttles()
+        tracemalloc.start()
+        request()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        p50, p95, p99 = self.percentiles(timings, (50, 95, 99))
+        self.stderr.write(
+            f"{name}: p50 {p50:.2f} ms, p95 {p95:.2f} ms, "
+            f"p99 {p99:.2f} ms, {statistics.median(queries)} queries"
+        )
+        return {
+            "name": name,
+            "method": method.upper(),
+            "url": url,
+            "params": data if method == "get" else None,
+            "status": dict(statuses),
+            "latency_ms": {
+                "p50": round(p50, 3),
+                "p95": round(p95, 3),
+                "p99": round(p99, 3),
+                "mean": round(statistics.fmean(timings), 3),
+                "max": round(max(timings), 3),
+            },
+            "queries": {
+                "median": statistics.median(queries),
+                "max": max(queries),
+            },
+            "peak_memory_bytes": peak,
+        }
+
+    def reset_throttles(self):
+        # Anonymous requests are throttled per address by both scopes.
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            for ident in (self.user.pk, CLIENT_ADDR):
+                throttle.reset(
+                    throttle.cache_format
+                    % {"scope": throttle.scope, "ident": ident}
+                )
+
+    @staticmethod
+    def percentiles(values, points):
+        if len(values) == 1:
+            return [values[0]] * len(points)
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+        return [cuts[point - 1] for point in points]
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from train_station.filters import day_bounds
+from train_station.models import Route, Station, Train, TrainType, Trip
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the departure_time__date filter with the half-open "
+        "departure range filter on a year of synthetic trips, with and "
+        "without the Trip timetable indexes. Prints query plans and "
+        "latency; all data and index changes are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--trips-per-day", type=int, default=200)
+        parser.add_argument("--routes", type=int, default=50)
+        parser.add_argument("--trains", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            route, day = self.populate(options)
+            self.analyze()
+            self.run("with timetable indexes", route, day, options)
+            self.drop_indexes()
+            self.analyze()
+            self.run("without timetable indexes", route, day, options)
+            transaction.set_rollback(True)
+
+    def populate(self, options):
+        stations = Station.objects.bulk_create(
+            Station(name=f"Bench {i}", latitude=i, longitude=i)
+            for i in range(options["routes"] + 1)
+        )
+        routes = Route.objects.bulk_create(
+            Route(source=source, destination=destination, distance=100)
+            for source, destination in zip(stations, stations[1:])
+        )
+        train_type = TrainType.objects.create(name="Bench")
+        trains = Train.objects.bulk_create(
+            Train(
+                name=f"Bench {i}",
+                cargo_num=10,
+                places_in_cargo=50,
+                train_type=train_type,
+            )
+            for i in range(options["trains"])
+        )
+
+        rng = random.Random(0)
+        start = timezone.now().replace(hour=0, minute=0, second=0)
+        total = options["days"] * options["trips_per_day"]
+        batch = []
+        for i in range(total):
+            departure = start + timedelta(
+                days=i // options["trips_per_day"],
+                minutes=rng.randrange(24 * 60),
+            )
+            batch.append(
+                Trip(
+                    route=rng.choice(routes),
+                    train=rng.choice(trains),
+                    departure_time=departure,
+                    arrival_time=departure + timedelta(hours=3),
+                )
+            )
+            if len(batch) == options["batch_size"]:
+                Trip.objects.bulk_create(batch)
+                batch = []
+        Trip.objects.bulk_create(batch)
+
+        self.stdout.write(
+            f"Created {total} trips over {options['days']} days."
+        )
+        day = timezone.localdate(start) + timedelta(days=options["days"] // 2)
+        return routes[0], day
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for index in Trip._meta.indexes:
+                cursor.execute(
+                    f"DROP INDEX {connection.ops.quote_name(index.name)}"
+                )
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def run(self, title, route, day, options):
+        start, end = day_bounds(day)
+        querysets = {
+            "date_cast": Trip.objects.filter(departure_time__date=day),
+            "day_range": Trip.objects.filter(
+                departure_time__gte=start, departure_time__lt=end
+            ),
+            "route_date_cast": Trip.objects.filter(
+                route=route, departure_time__date=day
+            ),
+            "route_day_range": Trip.objects.filter(
+                route=route, departure_time__gte=start, departure_time__lt=end
+            ),
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in querysets.items():
+            queryset = queryset.order_by("departure_time", "id")
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                rows = len(queryset.values_list("id", flat=True))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{name}: {rows} rows, "
+                f"median {statistics.median(timings):.2f} ms, "
+                f"max {max(timings):.2f} ms ({options['repeat']} runs)"
+            )
+            self.stdout.write(queryset.explain())
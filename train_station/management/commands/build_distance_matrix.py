@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from train_station.distances import distance_matrix
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the all-pairs route distance matrix and publish it to "
+        "every worker. Run it after deploys; route changes made through "
+        "the app rebuild the matrix on their own. Nothing is computed "
+        "while the published matrix is current unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute the matrix even if no route has changed.",
+        )
+
+    def handle(self, *args, **options):
+        with distance_matrix.build_lock() as acquired:
+            if not acquired:
+                self.stdout.write(
+                    "Another process is building the distance matrix."
+                )
+                return
+            if not options["force"] and distance_matrix.is_current():
+                self.stdout.write("Distance matrix is up to date.")
+                return
+
+            started = time.perf_counter()
+            matrix = distance_matrix.build()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Distance matrix of {len(matrix)} stations published to "
+                f"{settings.DISTANCE_MATRIX_DIR} after "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from train_station.exports import EXPORT_FORMATS, export_tickets
+from train_station.filters import parse_datetime_param
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every ticket of orders created in [start, end) as CSV or "
+        "NDJSON, with trip, route, train and user columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", help="Date or ISO datetime, inclusive.")
+        parser.add_argument("end", help="Date or ISO datetime, exclusive.")
+        parser.add_argument("--output", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument(
+            "--file", help="Write to this file instead of stdout."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_datetime_param("start", options["start"])
+            end = parse_datetime_param("end", options["end"])
+        except ValidationError as error:
+            raise CommandError(error.detail)
+
+        chunks = export_tickets(start, end, options["output"])
+        if not options["file"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["file"], "w", newline="") as file:
+            for chunk in chunks:
+                file.write(chunk)
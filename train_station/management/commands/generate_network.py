@@ -0,0 +1,236 @@
+import random
+from datetime import timedelta
+from math import asin, cos, radians, sin, sqrt
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from train_station.analytics import rebuild_daily_loads
+from train_station.caching import invalidate_network
+from train_station.models import (
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+
+SYLLABLES = (
+    "ko lo myr ha dov ny ki via bor zhy to mir pol ta va ro dub no ly chiv "
+    "ber ez sla vu tern op il uman ka sy"
+).split()
+SUFFIXES = ("", "", "", " Central", " Pasazhyrskyi", " East", " West")
+TRAIN_TYPES = ("Regional", "Intercity", "Intercity+", "Night", "Suburban")
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(a, b):
+    lat1, lon1, lat2, lon2 = map(radians, (*a, *b))
+    h = (
+        sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(h))
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic railway network for benchmarking: stations "
+        "scattered over Ukraine, routes to their nearest neighbours, trips "
+        "over the coming days and orders with tickets. Rows are inserted "
+        "with bulk_create in batches; tickets_sold is filled in directly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=1_000)
+        parser.add_argument("--neighbours", type=int, default=3)
+        parser.add_argument("--trains", type=int, default=500)
+        parser.add_argument("--trips", type=int, default=100_000)
+        parser.add_argument("--tickets", type=int, default=10_000_000)
+        parser.add_argument("--users", type=int, default=1_000)
+        parser.add_argument("--days", type=int, default=90)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        stations = self.create_stations(options["stations"])
+        routes = self.create_routes(stations, options["neighbours"])
+        trains = self.create_trains(options["trains"])
+        trips = self.create_trips(routes, trains, options)
+        users = self.create_users(options["users"])
+        tickets = self.create_tickets(trips, users, options["tickets"])
+
+        rebuild_daily_loads(batch_size=self.batch_size)
+        invalidate_network()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(stations)} stations, {len(routes)} routes, "
+                f"{len(trains)} trains, {len(trips)} trips, {len(users)} "
+                f"users and {tickets} tickets."
+            )
+        )
+
+    def create_stations(self, count):
+        names = set()
+        stations = []
+        while len(stations) < count:
+            name = "".join(
+                self.rng.choice(SYLLABLES)
+                for _ in range(self.rng.randint(2, 4))
+            ).capitalize()
+            name += self.rng.choice(SUFFIXES)
+            if name in names:
+                continue
+            names.add(name)
+            stations.append(
+                Station(
+                    name=name,
+                    latitude=round(self.rng.uniform(44.4, 52.3), 6),
+                    longitude=round(self.rng.uniform(22.2, 40.2), 6),
+                )
+            )
+        return Station.objects.bulk_create(
+            stations, batch_size=self.batch_size
+        )
+
+    def create_routes(self, stations, neighbours):
+        pairs = {}
+        for station in stations:
+            here = (station.latitude, station.longitude)
+            nearest = sorted(
+                (
+                    (haversine(here, (other.latitude, other.longitude)), other)
+                    for other in stations
+                    if other.pk != station.pk
+                ),
+                key=lambda item: item[0],
+            )
+            for distance, other in nearest[:neighbours]:
+                for source, destination in (
+                    (station, other),
+                    (other, station),
+                ):
+                    pairs.setdefault(
+                        (source.pk, destination.pk), max(1, round(distance))
+                    )
+
+        return Route.objects.bulk_create(
+            (
+                Route(
+                    source_id=source,
+                    destination_id=destination,
+                    distance=distance,
+                )
+                for (source, destination), distance in pairs.items()
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def create_trains(self, count):
+        train_types = TrainType.objects.bulk_create(
+            TrainType(name=name) for name in TRAIN_TYPES
+        )
+        return Train.objects.bulk_create(
+            (
+                Train(
+                    name=f"{self.rng.choice(SYLLABLES).upper()}-{number}",
+                    cargo_num=self.rng.randint(4, 16),
+                    places_in_cargo=self.rng.choice((36, 54, 58, 68, 80)),
+                    train_type=self.rng.choice(train_types),
+                )
+                for number in range(1, count + 1)
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def create_trips(self, routes, trains, options):
+        """Create trips and decide up front how many tickets each sells.
+
+        Returns ``(trip, sold)`` pairs; ``sold`` is spread evenly over the
+        trips and capped at the capacity of the train.
+        """
+        count = options["trips"]
+        per_trip, extra = divmod(options["tickets"], count)
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        minutes = options["days"] * 24 * 60
+
+        trips = []
+        for i in range(count):
+            route = self.rng.choice(routes)
+            train = self.rng.choice(trains)
+            capacity = train.cargo_num * train.places_in_cargo
+            sold = min(capacity, per_trip + (i < extra))
+            departure = start + timedelta(minutes=self.rng.randrange(minutes))
+            hours = route.distance / self.rng.uniform(60, 140)
+            trips.append(
+                (
+                    Trip(
+                        route=route,
+                        train=train,
+                        departure_time=departure,
+                        arrival_time=departure + timedelta(hours=hours),
+                        tickets_sold=sold,
+                    ),
+                    sold,
+                )
+            )
+
+        Trip.objects.bulk_create(
+            (trip for trip, _ in trips), batch_size=self.batch_size
+        )
+        return trips
+
+    def create_users(self, count):
+        return get_user_model().objects.bulk_create(
+            (
+                get_user_model()(
+                    email=f"passenger{number}@train-station.local",
+                    password="!",
+                )
+                for number in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def create_tickets(self, trips, users, limit):
+        orders, tickets = [], []
+        created = 0
+        for trip, sold in trips:
+            train = trip.train
+            places = self.rng.sample(
+                range(train.cargo_num * train.places_in_cargo), sold
+            )
+            while places:
+                order = Order(user=self.rng.choice(users))
+                orders.append(order)
+                for _ in range(min(len(places), self.rng.randint(1, 4))):
+                    place = places.pop()
+                    tickets.append(
+                        Ticket(
+                            trip=trip,
+                            order=order,
+                            cargo=place // train.places_in_cargo + 1,
+                            seat=place % train.places_in_cargo + 1,
+                        )
+                    )
+            if len(tickets) >= self.batch_size:
+                created += self.flush(orders, tickets)
+                orders, tickets = [], []
+                self.stdout.write(f"{created}/{limit} tickets", ending="\r")
+        created += self.flush(orders, tickets)
+        self.stdout.write(f"{created}/{limit} tickets")
+        return created
+
+    def flush(self, orders, tickets):
+        with transaction.atomic():
+            Order.objects.bulk_create(orders, batch_size=self.batch_size)
+            Ticket.objects.bulk_create(tickets, batch_size=self.batch_size)
+        return len(tickets)
@@ -0,0 +1,322 @@
+import csv
+import io
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from train_station.analytics import rebuild_daily_loads
+from train_station.caching import invalidate_network
+from train_station.models import Route, Station, Train, TrainType, Trip
+
+BUNDLE_FILES = {
+    "stations": ("station_id", "name", "latitude", "longitude"),
+    "routes": ("route_id", "source_id", "destination_id", "distance"),
+    "trains": (
+        "train_id",
+        "name",
+        "train_type",
+        "cargo_num",
+        "places_in_cargo",
+    ),
+    "trips": ("route_id", "train_id", "departure_time", "arrival_time"),
+}
+TRIP_COLUMNS = (
+    "route_id",
+    "train_id",
+    "departure_time",
+    "arrival_time",
+    "tickets_sold",
+)
+
+
+class Bundle:
+    """CSV files of a timetable bundle, in a directory or a zip archive."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise CommandError(f"{path} does not exist.")
+        self.archive = (
+            zipfile.ZipFile(self.path) if self.path.is_file() else None
+        )
+
+    @contextmanager
+    def open(self, name):
+        filename = f"{name}.txt"
+        if self.archive is not None:
+            members = set(self.archive.namelist())
+            if filename not in members:
+                filename = f"{name}.csv"
+            if filename not in members:
+                raise CommandError(f"{name}.txt is missing from the bundle.")
+            with self.archive.open(filename) as raw:
+                yield io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+            return
+
+        path = self.path / filename
+        if not path.exists():
+            path = self.path / f"{name}.csv"
+        if not path.exists():
+            raise CommandError(f"{name}.txt is missing from the bundle.")
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            yield file
+
+    def rows(self, name):
+        """Stream ``(line, row)`` pairs of a bundle file as dicts."""
+        with self.open(name) as file:
+            reader = csv.DictReader(file)
+            missing = set(BUNDLE_FILES[name]) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(
+                    f"{name}: missing columns {', '.join(sorted(missing))}."
+                )
+            for line, row in enumerate(reader, start=2):
+                yield line, row
+
+
+class Command(BaseCommand):
+    help = (
+        "Import stations, routes, trains and trips from a GTFS-like bundle: "
+        "a directory or zip archive with stations.txt, routes.txt, "
+        "trains.txt and trips.txt CSV files (.csv also accepted). Stations, "
+        "routes and trains are matched against existing rows, reverse "
+        "routes are added, and trips are streamed in batches with COPY on "
+        "PostgreSQL and bulk_create elsewhere. The import is atomic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("bundle", help="Directory or zip archive.")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--no-reverse-routes",
+            action="store_true",
+            help="Do not add the missing reverse of every imported route.",
+        )
+
+    def handle(self, *args, **options):
+        bundle = Bundle(options["bundle"])
+        self.batch_size = options["batch_size"]
+        self.use_copy = connection.vendor == "postgresql"
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            stations = self.import_stations(bundle)
+            routes = self.import_routes(
+                bundle, stations, not options["no_reverse_routes"]
+            )
+            trains = self.import_trains(bundle)
+            trips = self.import_trips(bundle, routes, trains)
+            rebuild_daily_loads(batch_size=self.batch_size)
+            invalidate_network()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {trips} trips over {len(routes)} routes, "
+                f"{len(set(stations.values()))} stations and "
+                f"{len(set(trains.values()))} trains in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
+
+    def import_stations(self, bundle):
+        """Map bundle station ids to station pks, reusing known stations.
+
+        Stations are matched on name and coordinates, so repeated
+        bundle entries and re-imports do not create duplicates.
+        """
+        known = {
+            (name, latitude, longitude): pk
+            for pk, name, latitude, longitude in Station.objects.values_list(
+                "pk", "name", "latitude", "longitude"
+            )
+        }
+        pending = {}
+        ids = {}
+        for line, row in bundle.rows("stations"):
+            key = (
+                row["name"].strip(),
+                self.number(float, row, "latitude", "stations", line),
+                self.number(float, row, "longitude", "stations", line),
+            )
+            ids[row["station_id"]] = key
+            if key not in known and key not in pending:
+                pending[key] = Station(
+                    name=key[0], latitude=key[1], longitude=key[2]
+                )
+
+        for station in Station.objects.bulk_create(
+            pending.values(), batch_size=self.batch_size
+        ):
+            known[station.name, station.latitude, station.longitude] = (
+                station.pk
+            )
+        return {station_id: known[key] for station_id, key in ids.items()}
+
+    def import_routes(self, bundle, stations, reverse):
+        """Map bundle route ids to route pks, one route per direction."""
+        known = {
+            (source, destination): pk
+            for pk, source, destination in Route.objects.values_list(
+                "pk", "source_id", "destination_id"
+            )
+        }
+        pending = {}
+        ids = {}
+        for line, row in bundle.rows("routes"):
+            key = (
+                self.reference(stations, row, "source_id", "routes", line),
+                self.reference(
+                    stations, row, "destination_id", "routes", line
+                ),
+            )
+            distance = self.number(int, row, "distance", "routes", line)
+            ids[row["route_id"]] = key
+            pending.setdefault(key, distance)
+            if reverse:
+                pending.setdefault(key[::-1], distance)
+
+        for route in Route.objects.bulk_create(
+            (
+                Route(
+                    source_id=source,
+                    destination_id=destination,
+                    distance=distance,
+                )
+                for (source, destination), distance in pending.items()
+                if (source, destination) not in known
+            ),
+            batch_size=self.batch_size,
+        ):
+            known[route.source_id, route.destination_id] = route.pk
+        return {route_id: known[key] for route_id, key in ids.items()}
+
+    def import_trains(self, bundle):
+        train_types = dict(TrainType.objects.values_list("name", "pk"))
+        known = {
+            (name, train_type): pk
+            for pk, name, train_type in Train.objects.values_list(
+                "pk", "name", "train_type_id"
+            )
+        }
+        pending = {}
+        ids = {}
+        for line, row in bundle.rows("trains"):
+            type_name = row["train_type"].strip()
+            if type_name not in train_types:
+                train_types[type_name] = TrainType.objects.create(
+                    name=type_name
+                ).pk
+            key = (row["name"].strip(), train_types[type_name])
+            ids[row["train_id"]] = key
+            if key not in known and key not in pending:
+                pending[key] = Train(
+                    name=key[0],
+                    train_type_id=key[1],
+                    cargo_num=self.number(
+                        int, row, "cargo_num", "trains", line
+                    ),
+                    places_in_cargo=self.number(
+                        int, row, "places_in_cargo", "trains", line
+                    ),
+                )
+
+        for train in Train.objects.bulk_create(
+            pending.values(), batch_size=self.batch_size
+        ):
+            known[train.name, train.train_type_id] = train.pk
+        return {train_id: known[key] for train_id, key in ids.items()}
+
+    def import_trips(self, bundle, routes, trains):
+        write = self.copy_trips if self.use_copy else self.create_trips
+        batch = []
+        imported = 0
+        for line, row in bundle.rows("trips"):
+            departure = self.moment(row, "departure_time", line)
+            arrival = self.moment(row, "arrival_time", line)
+            if arrival <= departure:
+                raise CommandError(
+                    f"trips line {line}: arrival_time must be after "
+                    "departure_time."
+                )
+            if arrival - departure > settings.MAX_TRIP_DURATION:
+                raise CommandError(
+                    f"trips line {line}: trips may last at most "
+                    f"{settings.MAX_TRIP_DURATION.total_seconds() / 3600:g} "
+                    "hours."
+                )
+            batch.append(
+                (
+                    self.reference(routes, row, "route_id", "trips", line),
+                    self.reference(trains, row, "train_id", "trips", line),
+                    departure,
+                    arrival,
+                    0,
+                )
+            )
+            if len(batch) == self.batch_size:
+                write(batch)
+                imported += len(batch)
+                batch = []
+        write(batch)
+        return imported + len(batch)
+
+    def create_trips(self, rows):
+        Trip.objects.bulk_create(
+            Trip(**dict(zip(TRIP_COLUMNS, row))) for row in rows
+        )
+
+    def copy_trips(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (route, train, departure.isoformat(), arrival.isoformat(), sold)
+            for route, train, departure, arrival, sold in rows
+        )
+        sql = (
+            f"COPY {Trip._meta.db_table} ({', '.join(TRIP_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):
+                buffer.seek(0)
+                raw.copy_expert(sql, buffer)
+            else:
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    @staticmethod
+    def number(kind, row, column, name, line):
+        try:
+            return kind(row[column])
+        except (TypeError, ValueError):
+            raise CommandError(
+                f"{name} line {line}: invalid {column} {row[column]!r}."
+            )
+
+    @staticmethod
+    def reference(ids, row, column, name, line):
+        try:
+            return ids[row[column]]
+        except KeyError:
+            raise CommandError(
+                f"{name} line {line}: unknown {column} {row[column]!r}."
+            )
+
+    @staticmethod
+    def moment(row, column, line):
+        try:
+            value = datetime.fromisoformat(row[column])
+        except (TypeError, ValueError):
+            raise CommandError(
+                f"trips line {line}: invalid {column} {row[column]!r}."
+            )
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
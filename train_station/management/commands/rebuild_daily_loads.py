@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from train_station.analytics import rebuild_daily_loads
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily load rollups of every route and train type "
+        "from the trips, ex. after loaddata or bulk updates that bypass "
+        "signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = rebuild_daily_loads(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(rows)} daily loads in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
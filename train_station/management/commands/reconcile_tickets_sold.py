@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from train_station.models import Ticket, Trip
+
+
+class Command(BaseCommand):
+    help = "Recount Trip.tickets_sold from the Ticket table and fix drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted trips, do not update them.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drifted = (
+            Trip.objects.annotate(actual=Count("tickets"))
+            .exclude(tickets_sold=F("actual"))
+            .values_list("id", "tickets_sold", "actual")
+        )
+        ids = []
+        for trip_id, stored, actual in drifted:
+            self.stdout.write(
+                f"Trip {trip_id}: stored {stored}, actual {actual}"
+            )
+            ids.append(trip_id)
+
+        if not options["dry_run"]:
+            sold = (
+                Ticket.objects.filter(trip=OuterRef("pk"))
+                .order_by()
+                .values("trip")
+                .annotate(count=Count("id"))
+                .values("count")
+            )
+            batch_size = options["batch_size"]
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                Trip.objects.filter(pk__in=ids[start:end]).update(
+                    tickets_sold=Coalesce(Subquery(sold), 0)
+                )
+
+        action = "Found" if options["dry_run"] else "Reconciled"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {len(ids)} drifted trip(s).")
+        )
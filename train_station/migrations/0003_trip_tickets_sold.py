@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:04
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_tickets_sold(apps, schema_editor):
+    Trip = apps.get_model("train_station", "Trip")
+    Ticket = apps.get_model("train_station", "Ticket")
+
+    sold = (
+        Ticket.objects.filter(trip=OuterRef("pk"))
+        .order_by()
+        .values("trip")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Trip.objects.update(tickets_sold=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="tickets_sold",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_tickets_sold, migrations.RunPython.noop
+        ),
+    ]
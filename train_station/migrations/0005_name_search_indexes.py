@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Expression indexes matching Django's icontains lookup on PostgreSQL,
+# UPPER("name"::text) LIKE UPPER('%...%'), so pg_trgm can serve it.
+TRIGRAM_INDEXES = {
+    "train_station_station_name_trgm": "train_station_station",
+    "train_station_train_name_trgm": "train_station_train",
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            "USING gin (UPPER(name::text) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0004_seat_holds"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0005_name_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="trip_route_departure_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["train", "departure_time"],
+                name="trip_train_departure_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["departure_time", "id"], name="trip_departure_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["arrival_time"], name="trip_arrival_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:36
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_routes(apps, schema_editor):
+    Route = apps.get_model("train_station", "Route")
+    Trip = apps.get_model("train_station", "Trip")
+
+    duplicates = (
+        Route.objects.order_by()
+        .values("source", "destination")
+        .annotate(keep=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for pair in duplicates:
+        extra = Route.objects.filter(
+            source=pair["source"], destination=pair["destination"]
+        ).exclude(id=pair["keep"])
+        Trip.objects.filter(route__in=extra).update(route=pair["keep"])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0006_trip_timetable_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_routes, migrations.RunPython.noop),
+    ]
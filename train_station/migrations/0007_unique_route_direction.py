@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The constraint is added after the duplicates are merged and
+    # committed: PostgreSQL refuses to alter the route table while the
+    # merge still has deferred foreign key checks pending.
+
+    dependencies = [
+        ("train_station", "0007_merge_duplicate_routes"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="route",
+            constraint=models.UniqueConstraint(
+                fields=("source", "destination"), name="unique_route_direction"
+            ),
+        ),
+    ]
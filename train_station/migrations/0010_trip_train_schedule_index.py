@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0009_order_user_created_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="trip",
+            name="trip_train_departure_idx",
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["train", "departure_time", "arrival_time"],
+                name="trip_train_schedule_idx",
+            ),
+        ),
+    ]
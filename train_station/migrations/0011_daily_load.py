@@ -0,0 +1,91 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_loads(apps, schema_editor):
+    Trip = apps.get_model("train_station", "Trip")
+    DailyLoad = apps.get_model("train_station", "DailyLoad")
+
+    rows = (
+        Trip.objects.annotate(date=TruncDate("departure_time"))
+        .order_by()
+        .values("route", "date", "train__train_type")
+        .annotate(
+            trip_count=Count("id"),
+            seat_count=Sum(F("train__cargo_num") * F("train__places_in_cargo")),
+            sold=Sum("tickets_sold"),
+        )
+    )
+    DailyLoad.objects.bulk_create(
+        (
+            DailyLoad(
+                route_id=row["route"],
+                date=row["date"],
+                train_type_id=row["train__train_type"],
+                trips=row["trip_count"],
+                seats=row["seat_count"],
+                tickets_sold=row["sold"],
+            )
+            for row in rows
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0010_trip_train_schedule_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyLoad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("trips", models.IntegerField(default=0)),
+                ("seats", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_loads",
+                        to="train_station.route",
+                    ),
+                ),
+                (
+                    "train_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_loads",
+                        to="train_station.traintype",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["date", "id"], name="daily_load_date_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("route", "date", "train_type"), name="unique_daily_load"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_daily_loads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 04:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0011_daily_load"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="throttlecounter",
+            name="expires_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
 
 from train_station_service import settings
 
@@ -31,6 +32,51 @@ class Station(models.Model):
         return f"{self.name} ({self.latitude}, {self.longitude})"
 
 
+class RouteQuerySet(models.QuerySet):
+    def upsert(self, routes, batch_size=None):
+        """Create or update routes in both directions.
+
+        ``routes`` holds ``(source, destination, distance)`` triples of
+        stations or station ids. Every pair also writes its mirror with the
+        same distance, unless the mirror is listed itself. Each batch is a
+        single INSERT ... ON CONFLICT, and all of them run in one
+        transaction.
+        """
+        from train_station.caching import invalidate_responses
+        from train_station.distances import distance_matrix
+
+        distances = {}
+        mirrors = {}
+        for source, destination, distance in routes:
+            pair = (
+                getattr(source, "pk", source),
+                getattr(destination, "pk", destination),
+            )
+            distances[pair] = distance
+            mirrors[pair[::-1]] = distance
+        for pair, distance in mirrors.items():
+            distances.setdefault(pair, distance)
+
+        with transaction.atomic(using=self.db):
+            routes = self.bulk_create(
+                (
+                    Route(
+                        source_id=source,
+                        destination_id=destination,
+                        distance=distance,
+                    )
+                    for (source, destination), distance in distances.items()
+                ),
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=("source", "destination"),
+                update_fields=("distance",),
+            )
+        invalidate_responses(Route)
+        distance_matrix.invalidate()
+        return routes
+
+
 class Route(models.Model):
     source = models.ForeignKey(
         Station, on_delete=models.CASCADE, related_name="routes_as_source"
@@ -40,19 +86,48 @@ class Route(models.Model):
     )
     distance = models.IntegerField()
 
+    objects = RouteQuerySet.as_manager()
+
     class Meta:
         ordering = ["source", "destination"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=("source", "destination"), name="unique_route_direction"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.source.name} to {self.destination.name}"
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            Route.objects.bulk_create(
+                [
+                    Route(
+                        source_id=self.destination_id,
+                        destination_id=self.source_id,
+                        distance=self.distance,
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+
 
-        Route.objects.get_or_create(
-            source=self.destination,
-            destination=self.source,
-            defaults={"distance": self.distance},
+class TripQuerySet(models.QuerySet):
+    def add_tickets_sold(self, counts):
+        """Shift tickets_sold by ``{trip_id: delta}`` in a single UPDATE."""
+        if not counts:
+            return 0
+        return self.filter(pk__in=counts).update(
+            tickets_sold=F("tickets_sold")
+            + Case(
+                *(
+                    When(pk=trip_id, then=Value(delta))
+                    for trip_id, delta in counts.items()
+                ),
+                default=Value(0),
+            )
         )
 
 
@@ -65,6 +140,25 @@ class Trip(models.Model):
     )
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    tickets_sold = models.IntegerField(default=0, editable=False)
+
+    objects = TripQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["route", "departure_time"],
+                name="trip_route_departure_idx",
+            ),
+            models.Index(
+                fields=["train", "departure_time", "arrival_time"],
+                name="trip_train_schedule_idx",
+            ),
+            models.Index(
+                fields=["departure_time", "id"], name="trip_departure_id_idx"
+            ),
+            models.Index(fields=["arrival_time"], name="trip_arrival_idx"),
+        ]
 
     def __str__(self):
         return f"{self.route} ({self.train})"
@@ -89,6 +183,14 @@ class Order(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="order_user_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return str(self.created_at)
 
@@ -109,3 +211,89 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("trip", "cargo", "seat")
         ordering = ["cargo", "seat"]
+
+
+class SeatHold(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+
+    def __str__(self):
+        return f"Hold until {self.expires_at}"
+
+
+class HeldSeat(models.Model):
+    cargo = models.IntegerField()
+    seat = models.IntegerField()
+    trip = models.ForeignKey(
+        Trip, on_delete=models.CASCADE, related_name="held_seats"
+    )
+    hold = models.ForeignKey(
+        SeatHold, on_delete=models.CASCADE, related_name="seats"
+    )
+
+    def __str__(self):
+        return f"{self.trip} (cargo: {self.cargo}, seat: {self.seat})"
+
+    class Meta:
+        unique_together = ("trip", "cargo", "seat")
+        ordering = ["cargo", "seat"]
+
+
+class DailyLoad(models.Model):
+    """Seats offered and sold on a route by one train type in one day.
+
+    Days are the local departure dates of the trips.
+    """
+
+    route = models.ForeignKey(
+        Route, on_delete=models.CASCADE, related_name="daily_loads"
+    )
+    date = models.DateField()
+    train_type = models.ForeignKey(
+        TrainType, on_delete=models.CASCADE, related_name="daily_loads"
+    )
+    trips = models.IntegerField(default=0)
+    seats = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("route", "date", "train_type"),
+                name="unique_daily_load",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date", "id"], name="daily_load_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.route_id} {self.date} {self.train_type_id}"
+
+    @property
+    def load_factor(self):
+        return self.tickets_sold / self.seats if self.seats else None
+
+
+class ThrottleCounter(models.Model):
+    """Requests made by one client in one throttle window."""
+
+    key = models.CharField(max_length=255)
+    window = models.BigIntegerField()
+    count = models.IntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("key", "window"), name="unique_throttle_window"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key} @ {self.window}: {self.count}"
@@ -0,0 +1,38 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Opaque-cursor pagination over a stable, index-friendly ordering.
+
+    The cursor holds the first ordering field of the page boundary, so a
+    page is fetched with a ``WHERE field > cursor`` range on that field's
+    index rather than an ``OFFSET`` from the start, and a deep page costs
+    about the same as the first one. Rows that tie with the cursor on
+    that field are skipped with an ``OFFSET`` over the ties only, which
+    grows with the number of rows sharing one ``departure_time`` or
+    ``created_at``, not with the page number.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class TripPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class RoutePagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class CrewPagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class DailyLoadPagination(KeysetPagination):
+    ordering = ("date", "id")
@@ -0,0 +1,121 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from train_station.analytics import record_tickets_sold
+from train_station.models import HeldSeat, SeatHold, Ticket, Trip
+from train_station.seats import invalidate_seat_maps
+
+SEAT_FIELDS = ("trip", "cargo", "seat")
+
+
+class SeatUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are no longer available."
+    default_code = "seat_unavailable"
+
+
+def lock_trips(trip_ids):
+    """Row-lock trips in ascending id order.
+
+    Every booking path takes its trip locks in the same order, so two
+    requests for overlapping trips queue up instead of deadlocking.
+    """
+    return list(
+        Trip.objects.select_for_update()
+        .filter(pk__in=trip_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def find_unavailable(seats, now, exclude_hold=None):
+    """Return the ``(trip_id, cargo, seat)`` items that are sold or held."""
+    lookup = {
+        "trip__in": {trip_id for trip_id, _, _ in seats},
+        "cargo__in": {cargo for _, cargo, _ in seats},
+        "seat__in": {seat for _, _, seat in seats},
+    }
+    held = HeldSeat.objects.filter(hold__expires_at__gt=now, **lookup)
+    if exclude_hold is not None:
+        held = held.exclude(hold=exclude_hold)
+
+    taken = set(Ticket.objects.filter(**lookup).values_list(*SEAT_FIELDS))
+    taken.update(held.values_list(*SEAT_FIELDS))
+    return seats & taken
+
+
+def release_expired_holds(trip_ids, now):
+    """Delete expired holds on the trips, which must be locked."""
+    deleted, _ = SeatHold.objects.filter(
+        expires_at__lte=now, seats__trip__in=trip_ids
+    ).delete()
+    if deleted:
+        invalidate_seat_maps(trip_ids)
+
+
+def hold_seats(user, seats):
+    """Reserve ``(trip_id, cargo, seat)`` items for ``SEAT_HOLD_TTL``."""
+    seats = set(seats)
+    trip_ids = sorted({trip_id for trip_id, _, _ in seats})
+
+    with transaction.atomic():
+        lock_trips(trip_ids)
+        now = timezone.now()
+        release_expired_holds(trip_ids, now)
+
+        if find_unavailable(seats, now):
+            raise SeatUnavailable()
+
+        hold = SeatHold.objects.create(
+            user=user, expires_at=now + settings.SEAT_HOLD_TTL
+        )
+        HeldSeat.objects.bulk_create(
+            HeldSeat(hold=hold, trip_id=trip_id, cargo=cargo, seat=seat)
+            for trip_id, cargo, seat in sorted(seats)
+        )
+        invalidate_seat_maps(trip_ids)
+        return hold
+
+
+def book_seats(order, seats, hold=None):
+    """Create tickets of ``order`` for ``(trip_id, cargo, seat)`` items.
+
+    When ``hold`` is given the seats are confirmed against it and the
+    hold is released; otherwise they must not be held by anybody else.
+    """
+    seats = set(seats)
+    trip_ids = sorted({trip_id for trip_id, _, _ in seats})
+
+    with transaction.atomic():
+        lock_trips(trip_ids)
+        now = timezone.now()
+
+        if hold is not None:
+            active = SeatHold.objects.filter(pk=hold.pk, expires_at__gt=now)
+            if not active.exists():
+                raise SeatUnavailable("The seat hold has expired.")
+
+        release_expired_holds(trip_ids, now)
+        if find_unavailable(seats, now, exclude_hold=hold):
+            raise SeatUnavailable()
+
+        try:
+            Ticket.objects.bulk_create(
+                Ticket(order=order, trip_id=trip_id, cargo=cargo, seat=seat)
+                for trip_id, cargo, seat in sorted(seats)
+            )
+        except IntegrityError:
+            raise SeatUnavailable()
+
+        sold = Counter(trip_id for trip_id, _, _ in seats)
+        Trip.objects.add_tickets_sold(sold)
+        record_tickets_sold(sold)
+        invalidate_seat_maps(sold)
+
+        if hold is not None:
+            hold.delete()
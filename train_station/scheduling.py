@@ -0,0 +1,65 @@
+import heapq
+
+from django.conf import settings
+
+from train_station.models import Trip
+
+SCHEDULE_FIELDS = ("id", "train_id", "departure_time", "arrival_time")
+
+
+def find_overlaps(trips):
+    """Yield ``(earlier, later)`` pairs of overlapping trips.
+
+    ``trips`` are objects or dicts with ``departure_time`` and
+    ``arrival_time``. A sweep over departures keeps the trips still under
+    way in a heap keyed by arrival, so ``n`` trips with ``k`` overlaps
+    cost ``O(n log n + k)``. Intervals are half-open: a trip may depart
+    the moment the previous one arrives.
+    """
+    active = []
+    ordered = sorted(enumerate(trips), key=lambda item: _bounds(item[1])[0])
+    for index, trip in ordered:
+        departure, arrival = _bounds(trip)
+        while active and active[0][0] <= departure:
+            heapq.heappop(active)
+        for _, _, other in active:
+            yield other, trip
+        heapq.heappush(active, (arrival, index, trip))
+
+
+def _bounds(trip):
+    if isinstance(trip, dict):
+        return trip["departure_time"], trip["arrival_time"]
+    return trip.departure_time, trip.arrival_time
+
+
+def find_train_conflict(train, departure_time, arrival_time, exclude=None):
+    """Return a trip of ``train`` overlapping the given times, if any.
+
+    Existing trips may already overlap each other, ex. after bulk
+    imports, so every trip under way in the interval is a candidate.
+    Trips last at most ``MAX_TRIP_DURATION``, so the candidates depart
+    within that long before ``departure_time`` and before
+    ``arrival_time``: a short range of the ``(train, departure_time,
+    arrival_time)`` index, however long the train's history.
+    """
+    trips = Trip.objects.filter(
+        train=train,
+        departure_time__gt=departure_time - settings.MAX_TRIP_DURATION,
+        departure_time__lt=arrival_time,
+        arrival_time__gt=departure_time,
+    )
+    if exclude is not None:
+        trips = trips.exclude(pk=exclude)
+    return trips.order_by("departure_time").only(*SCHEDULE_FIELDS).first()
+
+
+def crew_trips(crew, start, end):
+    """Trips of a crew member that are under way in ``[start, end)``."""
+    return (
+        Trip.objects.filter(
+            crew=crew, departure_time__lt=end, arrival_time__gt=start
+        )
+        .order_by("departure_time")
+        .values(*SCHEDULE_FIELDS)
+    )
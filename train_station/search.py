@@ -0,0 +1,156 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q
+
+from train_station.models import Station, Train
+from train_station.snapshots import LocalSnapshot
+
+WORD_START = re.compile(r"\b\w", re.UNICODE)
+WORD_SEPARATORS = (" ", "-", "(")
+
+
+class NameIndex:
+    """In-process substring and word-prefix index over object names.
+
+    Substring lookups intersect trigram posting sets and verify the few
+    candidates left; prefix lookups bisect a sorted list holding every
+    word suffix of every name.
+    """
+
+    def __init__(self, rows=()):
+        self.names = {}
+        self.trigrams = defaultdict(set)
+        self.prefixes = []
+        for pk, name in rows:
+            self._index(pk, name)
+        self.prefixes.sort()
+
+    def add(self, pk, name):
+        self.remove(pk)
+        for key in self._index(pk, name):
+            insort(self.prefixes, key)
+
+    def remove(self, pk):
+        name = self.names.pop(pk, None)
+        if name is None:
+            return
+        for gram in self._trigrams(name):
+            self.trigrams[gram].discard(pk)
+        for key in self._prefix_keys(pk, name):
+            index = bisect_left(self.prefixes, key)
+            if index < len(self.prefixes) and self.prefixes[index] == key:
+                del self.prefixes[index]
+
+    def contains(self, query):
+        query = query.casefold()
+        grams = self._trigrams(query)
+        if not grams:
+            return {pk for pk, name in self.names.items() if query in name}
+
+        postings = sorted(
+            (self.trigrams.get(gram, ()) for gram in grams), key=len
+        )
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {pk for pk in candidates if query in self.names[pk]}
+
+    def startswith(self, query, limit=10):
+        query = query.casefold()
+        found = []
+        index = bisect_left(self.prefixes, (query,))
+        while len(found) < limit and index < len(self.prefixes):
+            key, pk = self.prefixes[index]
+            if not key.startswith(query):
+                break
+            if pk not in found:
+                found.append(pk)
+            index += 1
+        return found
+
+    def _index(self, pk, name):
+        name = name.casefold()
+        self.names[pk] = name
+        for gram in self._trigrams(name):
+            self.trigrams[gram].add(pk)
+        keys = self._prefix_keys(pk, name)
+        self.prefixes.extend(keys)
+        return keys
+
+    @staticmethod
+    def _trigrams(name):
+        return {a + b + c for a, b, c in zip(name, name[1:], name[2:])}
+
+    @staticmethod
+    def _prefix_keys(pk, name):
+        starts = (match.start() for match in WORD_START.finditer(name))
+        return [(name[start:], pk) for start in starts]
+
+
+class NameSnapshot(LocalSnapshot):
+    model = None
+
+    def build(self):
+        return NameIndex(self.model.objects.values_list("id", "name"))
+
+    def save(self, instance):
+        pk, name = instance.pk, instance.name
+        self.update(lambda index: index.add(pk, name))
+
+    def delete(self, pk):
+        self.update(lambda index: index.remove(pk))
+
+
+class StationNameSnapshot(NameSnapshot):
+    model = Station
+    version_name = "station-names"
+
+
+class TrainNameSnapshot(NameSnapshot):
+    model = Train
+    version_name = "train-names"
+
+
+station_names = StationNameSnapshot()
+train_names = TrainNameSnapshot()
+
+
+def uses_database_index():
+    # pg_trgm GIN indexes serve ILIKE '%x%' directly on PostgreSQL.
+    return connection.vendor == "postgresql"
+
+
+def match_stations(query):
+    """Ids of stations whose name contains ``query``, case-insensitively."""
+    if uses_database_index():
+        return Station.objects.filter(name__icontains=query).values_list(
+            "id", flat=True
+        )
+    return station_names.get().contains(query)
+
+
+def match_trains(query):
+    if uses_database_index():
+        return Train.objects.filter(name__icontains=query).values_list(
+            "id", flat=True
+        )
+    return train_names.get().contains(query)
+
+
+def autocomplete_stations(query, limit=10):
+    """Stations having a word in their name that starts with ``query``."""
+    if uses_database_index():
+        word_start = Q(name__istartswith=query)
+        for separator in WORD_SEPARATORS:
+            word_start |= Q(name__icontains=separator + query)
+        return list(
+            Station.objects.filter(word_start)
+            .order_by("name")
+            .values("id", "name")[:limit]
+        )
+    ids = station_names.get().startswith(query, limit)
+    stations = Station.objects.in_bulk(ids)
+    return [
+        {"id": pk, "name": stations[pk].name} for pk in ids if pk in stations
+    ]
@@ -0,0 +1,98 @@
+from base64 import b64encode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from train_station.models import HeldSeat, Trip
+from train_station_service.replicas import use_primary
+
+SEAT_MAP_CACHE_KEY = "train-station:seat-map:{}"
+
+
+def seat_map_cache_key(trip_id):
+    return SEAT_MAP_CACHE_KEY.format(trip_id)
+
+
+def build_seat_map(trip_id):
+    """Build the occupancy bitmap of a trip and the time it changes by.
+
+    Every cargo is encoded as ``ceil(places_in_cargo / 8)`` bytes where
+    bit ``seat - 1`` (most significant bit first) is set when the seat is
+    sold or held. Sold seats are read in one query and held ones in
+    another; the map is returned with the expiry of its earliest hold,
+    or ``None`` when nothing is held. Returns ``(None, None)`` when the
+    trip does not exist.
+    """
+    rows = Trip.objects.filter(pk=trip_id).values_list(
+        "train__cargo_num",
+        "train__places_in_cargo",
+        "tickets__cargo",
+        "tickets__seat",
+    )
+
+    cargos = None
+    taken = 0
+
+    def mark(cargo, seat):
+        if 1 <= cargo <= cargo_num and 1 <= seat <= places_in_cargo:
+            byte, bit = (seat - 1) // 8, 0x80 >> ((seat - 1) % 8)
+            if not cargos[cargo - 1][byte] & bit:
+                cargos[cargo - 1][byte] |= bit
+                return 1
+        return 0
+
+    for cargo_num, places_in_cargo, cargo, seat in rows:
+        if cargos is None:
+            cargos = [
+                bytearray((places_in_cargo + 7) // 8) for _ in range(cargo_num)
+            ]
+        if cargo is not None:
+            taken += mark(cargo, seat)
+
+    if cargos is None:
+        return None, None
+
+    expires_at = None
+    held = HeldSeat.objects.filter(
+        trip_id=trip_id, hold__expires_at__gt=timezone.now()
+    ).values_list("cargo", "seat", "hold__expires_at")
+    for cargo, seat, hold_expires_at in held:
+        taken += mark(cargo, seat)
+        if expires_at is None or hold_expires_at < expires_at:
+            expires_at = hold_expires_at
+
+    seat_map = {
+        "trip": int(trip_id),
+        "cargo_num": cargo_num,
+        "places_in_cargo": places_in_cargo,
+        "tickets_available": cargo_num * places_in_cargo - taken,
+        "encoding": "base64",
+        "cargos": [b64encode(bitmap).decode("ascii") for bitmap in cargos],
+    }
+    return seat_map, expires_at
+
+
+def get_seat_map(trip_id):
+    key = seat_map_cache_key(trip_id)
+    seat_map = cache.get(key)
+    if seat_map is None:
+        with use_primary():
+            seat_map, expires_at = build_seat_map(trip_id)
+        if seat_map is not None:
+            timeout = settings.SEAT_MAP_CACHE_TIMEOUT
+            if expires_at is not None:
+                # Released holds must not outlive their expiry here.
+                timeout = min(
+                    timeout, (expires_at - timezone.now()).total_seconds()
+                )
+            if timeout > 0:
+                cache.set(key, seat_map, timeout)
+    return seat_map
+
+
+def invalidate_seat_maps(trip_ids):
+    """Drop cached seat maps once the current transaction commits."""
+    keys = [seat_map_cache_key(trip_id) for trip_id in set(trip_ids)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,15 +1,47 @@
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from train_station.models import (
     Crew,
+    DailyLoad,
     Train,
     Station,
     Route,
     Trip,
     Ticket,
     Order,
+    SeatHold,
+    HeldSeat,
 )
+from train_station.projections import Column, DateTime, Projection, Template
+from train_station.reservations import (
+    SeatUnavailable,
+    book_seats,
+    find_unavailable,
+    hold_seats,
+)
+from train_station.scheduling import find_overlaps, find_train_conflict
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field that can resolve a whole batch in one query."""
+
+    def prefetch(self, pks):
+        valid_pks = set()
+        for pk in pks:
+            try:
+                valid_pks.add(int(pk))
+            except (TypeError, ValueError):
+                continue
+        self.prefetched = self.get_queryset().in_bulk(valid_pks)
+
+    def to_internal_value(self, data):
+        try:
+            return self.prefetched[int(data)]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
 
 
 class TrainSerializer(serializers.ModelSerializer):
@@ -47,6 +79,38 @@ class RouteSerializer(serializers.ModelSerializer):
         return data
 
 
+class RouteBulkSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            source = self.child.fields["source"]
+            source.prefetch(
+                item.get(name)
+                for item in data
+                if isinstance(item, dict)
+                for name in ("source", "destination")
+            )
+            self.child.fields["destination"].prefetched = source.prefetched
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        return Route.objects.upsert(
+            (route["source"], route["destination"], route["distance"])
+            for route in validated_data
+        )
+
+
+class RouteUpsertSerializer(RouteSerializer):
+    source = PrefetchedPrimaryKeyRelatedField(queryset=Station.objects.all())
+    destination = PrefetchedPrimaryKeyRelatedField(
+        queryset=Station.objects.all()
+    )
+
+    class Meta(RouteSerializer.Meta):
+        list_serializer_class = RouteBulkSerializer
+        # Existing routes are updated rather than rejected.
+        validators = []
+
+
 class RouteListSerializer(RouteSerializer):
     source = serializers.SlugRelatedField(slug_field="name", read_only=True)
     destination = serializers.SlugRelatedField(
@@ -81,19 +145,67 @@ class TripSerializer(serializers.ModelSerializer):
             "tickets_available",
         )
 
+    def validate(self, data):
+        schedule = {
+            field: data.get(field, getattr(self.instance, field, None))
+            for field in ("train", "departure_time", "arrival_time")
+        }
+        if schedule["arrival_time"] <= schedule["departure_time"]:
+            raise serializers.ValidationError(
+                "Arrival time must be after departure time."
+            )
+        duration = schedule["arrival_time"] - schedule["departure_time"]
+        if duration > settings.MAX_TRIP_DURATION:
+            raise serializers.ValidationError(
+                "Trips may last at most "
+                f"{settings.MAX_TRIP_DURATION.total_seconds() / 3600:g} hours."
+            )
+
+        conflict = find_train_conflict(
+            **schedule, exclude=getattr(self.instance, "pk", None)
+        )
+        if conflict is not None:
+            raise serializers.ValidationError(
+                f"Train is already scheduled for trip {conflict.pk} from "
+                f"{conflict.departure_time:%Y-%m-%d %H:%M} to "
+                f"{conflict.arrival_time:%Y-%m-%d %H:%M}."
+            )
+        return data
+
 
 class TripListSerializer(TripSerializer):
     route = serializers.StringRelatedField(read_only=True)
     train = serializers.StringRelatedField(read_only=True)
 
 
+# Same output as TripListSerializer, built from ``.values()`` rows.
+TRIP_LIST_PROJECTION = Projection(
+    id=Column("id"),
+    route=Template(
+        "{} to {}", "route__source__name", "route__destination__name"
+    ),
+    train=Template("{} ({})", "train__name", "train__train_type__name"),
+    departure_time=DateTime(
+        "departure_time",
+        TripListSerializer._declared_fields["departure_time"].format,
+    ),
+    arrival_time=DateTime(
+        "arrival_time",
+        TripListSerializer._declared_fields["arrival_time"].format,
+    ),
+    tickets_available=Column("tickets_available"),
+)
+
+
 class TripDetailSerializer(TripSerializer):
     route = RouteListSerializer(read_only=True)
     train = TrainSerializer(read_only=True)
 
 
 class CrewSerializer(serializers.ModelSerializer):
-    trips = TripSerializer(many=True)
+    trips = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Trip.objects.all()
+    )
 
     class Meta:
         model = Crew
@@ -105,6 +217,13 @@ class CrewSerializer(serializers.ModelSerializer):
             "full_name",
         )
 
+    def validate_trips(self, trips):
+        for earlier, later in find_overlaps(trips):
+            raise serializers.ValidationError(
+                f"Trips {earlier.pk} and {later.pk} overlap."
+            )
+        return trips
+
 
 class CrewListSerializer(CrewSerializer):
     trips = serializers.StringRelatedField(many=True, read_only=True)
@@ -114,31 +233,184 @@ class CrewListSerializer(CrewSerializer):
         fields = ("id", "full_name", "trips")
 
 
+class TicketBulkSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child.fields["trip"].prefetch(
+                item.get("trip") for item in data if isinstance(item, dict)
+            )
+        return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    trip = PrefetchedPrimaryKeyRelatedField(
+        queryset=Trip.objects.select_related("train"),
+    )
+
     class Meta:
         model = Ticket
         fields = ("id", "cargo", "seat", "trip")
+        list_serializer_class = TicketBulkSerializer
+        # Seat uniqueness is checked for the whole batch in
+        # validate_seats instead of once per ticket.
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
     trip = TripListSerializer(many=False, read_only=True)
 
 
+def validate_seats(tickets):
+    """Check a batch of requested seats against their trains and sales."""
+    seats = set()
+    for ticket in tickets:
+        trip, cargo, seat = ticket["trip"], ticket["cargo"], ticket["seat"]
+        if not 1 <= cargo <= trip.train.cargo_num:
+            raise serializers.ValidationError(
+                f"Cargo must be in range [1, {trip.train.cargo_num}]."
+            )
+        if not 1 <= seat <= trip.train.places_in_cargo:
+            raise serializers.ValidationError(
+                f"Seat must be in range [1, {trip.train.places_in_cargo}]."
+            )
+        if (trip.pk, cargo, seat) in seats:
+            raise serializers.ValidationError(
+                f"Seat {seat} in cargo {cargo} is requested twice."
+            )
+        seats.add((trip.pk, cargo, seat))
+
+    # Seats taken before the booking are a conflict, like those taken
+    # while it waits for its locks.
+    unavailable = find_unavailable(seats, timezone.now())
+    if unavailable:
+        _, cargo, seat = min(unavailable)
+        raise SeatUnavailable(
+            f"Seat {seat} in cargo {cargo} is already taken."
+        )
+
+    return tickets
+
+
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = TicketSerializer(
+        many=True, read_only=False, allow_empty=False, required=False
+    )
+    hold = serializers.PrimaryKeyRelatedField(
+        queryset=SeatHold.objects.all(), required=False, write_only=True
+    )
 
     class Meta:
         model = Order
-        fields = ("id", "created_at", "tickets")
+        fields = ("id", "created_at", "tickets", "hold")
+
+    def validate_tickets(self, tickets):
+        return validate_seats(tickets)
+
+    def validate_hold(self, hold):
+        request = self.context.get("request")
+        if request and hold.user_id != request.user.id:
+            raise serializers.ValidationError("Unknown seat hold.")
+        return hold
+
+    def validate(self, data):
+        if ("tickets" in data) == ("hold" in data):
+            raise serializers.ValidationError(
+                "Provide either tickets or a seat hold."
+            )
+        return data
 
     def create(self, validated_data):
+        hold = validated_data.pop("hold", None)
+        tickets_data = validated_data.pop("tickets", None)
+        if hold is not None:
+            seats = hold.seats.values_list("trip", "cargo", "seat")
+        else:
+            seats = [
+                (ticket["trip"].pk, ticket["cargo"], ticket["seat"])
+                for ticket in tickets_data
+            ]
+
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            book_seats(order, seats, hold=hold)
             return order
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class HeldSeatSerializer(serializers.ModelSerializer):
+    trip = PrefetchedPrimaryKeyRelatedField(
+        queryset=Trip.objects.select_related("train"),
+    )
+
+    class Meta:
+        model = HeldSeat
+        fields = ("trip", "cargo", "seat")
+        list_serializer_class = TicketBulkSerializer
+        validators = []
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "created_at", "expires_at", "seats")
+        read_only_fields = ("expires_at",)
+
+    def validate_seats(self, seats):
+        return validate_seats(seats)
+
+    def create(self, validated_data):
+        return hold_seats(
+            validated_data["user"],
+            (
+                (seat["trip"].pk, seat["cargo"], seat["seat"])
+                for seat in validated_data["seats"]
+            ),
+        )
+
+
+class JourneyQuerySerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    departure = serializers.DateTimeField(required=False)
+    min_transfer = serializers.IntegerField(min_value=0, required=False)
+    max_transfers = serializers.IntegerField(
+        min_value=0, max_value=5, default=3
+    )
+
+
+class DistanceQuerySerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=0, max_value=20_000, default=50)
+    k = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class DailyLoadSerializer(serializers.ModelSerializer):
+    route = serializers.StringRelatedField()
+    train_type = serializers.SlugRelatedField(
+        slug_field="name", read_only=True
+    )
+    load_factor = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = DailyLoad
+        fields = (
+            "id",
+            "date",
+            "route",
+            "train_type",
+            "trips",
+            "seats",
+            "tickets_sold",
+            "load_factor",
+        )
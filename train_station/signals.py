@@ -0,0 +1,194 @@
+import threading
+from collections import Counter
+
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from train_station.analytics import (
+    daily_load_key,
+    record_tickets_sold,
+    refresh_daily_loads,
+)
+from train_station.caching import invalidate_responses
+from train_station.distances import distance_matrix
+from train_station.geo import station_grid
+from train_station.journeys import timetable
+from train_station.models import (
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.search import station_names, train_names
+from train_station.seats import invalidate_seat_maps
+
+
+@receiver(post_save, sender=Ticket)
+def increment_tickets_sold(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        Trip.objects.add_tickets_sold({instance.trip_id: 1})
+        record_tickets_sold({instance.trip_id: 1})
+        invalidate_seat_maps([instance.trip_id])
+
+
+class TicketDeletions(threading.local):
+    """Tickets of the deletions under way, by deletion origin.
+
+    A deletion sends ``pre_delete`` for every instance it collected
+    before any ``post_delete``, so the trips are updated once, after the
+    last of its tickets is gone, instead of once per ticket. A ticket
+    seen again means the deletion that first saw it failed.
+    """
+
+    def __init__(self):
+        # id(origin) -> (origin, pks of tickets left, trip deltas)
+        self.pending = {}
+
+    def start(self, origin, ticket):
+        _, tickets, counts = self.pending.setdefault(
+            id(origin), (origin, set(), Counter())
+        )
+        if ticket.pk in tickets:
+            tickets.clear()
+            counts.clear()
+        tickets.add(ticket.pk)
+
+    def finish(self, origin, ticket):
+        """Count ``ticket`` out; the deltas once it is the last one."""
+        _, tickets, counts = self.pending.get(id(origin), (None, set(), None))
+        if ticket.pk not in tickets:
+            return {ticket.trip_id: -1}
+        tickets.remove(ticket.pk)
+        counts[ticket.trip_id] -= 1
+        if tickets:
+            return None
+        del self.pending[id(origin)]
+        return counts
+
+
+ticket_deletions = TicketDeletions()
+
+
+@receiver(pre_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, origin=None, **kwargs):
+    ticket_deletions.start(origin, instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def decrement_tickets_sold(sender, instance, origin=None, **kwargs):
+    counts = ticket_deletions.finish(origin, instance)
+    if counts:
+        Trip.objects.add_tickets_sold(counts)
+        record_tickets_sold(counts)
+        invalidate_seat_maps(list(counts))
+
+
+@receiver(post_save, sender=Trip)
+def invalidate_trip_seat_map(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_seat_maps([instance.pk])
+
+
+@receiver(post_save, sender=Trip)
+def update_timetable_trip(sender, instance, **kwargs):
+    timetable.save_trip(instance)
+
+
+@receiver(post_delete, sender=Trip)
+def delete_timetable_trip(sender, instance, **kwargs):
+    timetable.delete_trip(instance.pk)
+
+
+@receiver(pre_save, sender=Trip)
+def remember_daily_load_key(sender, instance, raw, **kwargs):
+    if instance.pk is None or raw:
+        return
+    previous = (
+        Trip.objects.filter(pk=instance.pk)
+        .values_list("route", "departure_time")
+        .first()
+    )
+    instance.previous_daily_load_key = (
+        daily_load_key(*previous) if previous else None
+    )
+
+
+@receiver(post_save, sender=Trip)
+def update_trip_daily_load(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    keys = {daily_load_key(instance.route_id, instance.departure_time)}
+    previous = getattr(instance, "previous_daily_load_key", None)
+    if previous is not None:
+        keys.add(previous)
+    refresh_daily_loads(keys)
+
+
+@receiver(post_delete, sender=Trip)
+def delete_trip_daily_load(sender, instance, **kwargs):
+    refresh_daily_loads(
+        [daily_load_key(instance.route_id, instance.departure_time)]
+    )
+
+
+@receiver(post_save, sender=Train)
+def update_train_daily_loads(sender, instance, created, raw, **kwargs):
+    if created or raw:
+        return
+    refresh_daily_loads(
+        daily_load_key(route_id, departure_time)
+        for route_id, departure_time in instance.trips.values_list(
+            "route", "departure_time"
+        )
+    )
+
+
+@receiver(post_save, sender=Route)
+def invalidate_timetable_route(sender, instance, created, **kwargs):
+    if not created:
+        timetable.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Route)
+def invalidate_distance_matrix(sender, **kwargs):
+    distance_matrix.invalidate()
+
+
+@receiver(post_save, sender=Station)
+def update_station_names(sender, instance, **kwargs):
+    station_names.save(instance)
+
+
+@receiver(post_delete, sender=Station)
+def delete_station_name(sender, instance, **kwargs):
+    station_names.delete(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Station)
+def invalidate_station_grid(sender, **kwargs):
+    station_grid.invalidate()
+
+
+@receiver(post_save, sender=Train)
+def update_train_names(sender, instance, **kwargs):
+    train_names.save(instance)
+
+
+@receiver(post_delete, sender=Train)
+def delete_train_name(sender, instance, **kwargs):
+    train_names.delete(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Station)
+@receiver([post_save, post_delete], sender=Train)
+@receiver([post_save, post_delete], sender=TrainType)
+@receiver([post_save, post_delete], sender=Route)
+def invalidate_reference_responses(sender, **kwargs):
+    invalidate_responses(sender)
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+
+from train_station_service.replicas import use_primary
+
+VERSION_KEY = "train-station:version:{}"
+
+
+def get_version(name):
+    # Versions start from the current time, so a key evicted from the
+    # cache never comes back with a value that was already handed out.
+    return cache.get_or_set(VERSION_KEY.format(name), time.time_ns(), None)
+
+
+def bump_version(name):
+    key = VERSION_KEY.format(name)
+    cache.add(key, time.time_ns(), None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_version(name)
+
+
+def has_atomic_incr():
+    """Whether two processes bumping a version at once get distinct
+    values. The file cache's ``incr`` is a ``get`` and a ``set``."""
+    return isinstance(
+        caches[DEFAULT_CACHE_ALIAS], (RedisCache, BaseMemcachedCache)
+    )
+
+
+class LocalSnapshot:
+    """Per-process, read-mostly copy of database state.
+
+    The snapshot is built lazily and kept for as long as its version in
+    the default cache, which all workers share, does not move. Changes
+    made by this process are applied in place once the transaction
+    commits; any other process sees the bumped version and rebuilds on
+    its next read. Applying in place relies on ``incr`` being atomic, as
+    it is on Redis and memcached; with other caches the changing process
+    rebuilds as well.
+    """
+
+    version_name = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._state = None
+        self._version = None
+
+    def build(self):
+        raise NotImplementedError
+
+    def get(self):
+        version = get_version(self.version_name)
+        with self._lock:
+            if self._state is None or self._version != version:
+                with use_primary():
+                    self._state = self.build()
+                self._version = version
+            return self._state
+
+    def update(self, func):
+        """Apply ``func(state)`` after commit and publish a new version."""
+        transaction.on_commit(lambda: self._apply(func))
+
+    def invalidate(self):
+        transaction.on_commit(self._drop)
+
+    def _apply(self, func):
+        with self._lock:
+            seen = get_version(self.version_name)
+            version = bump_version(self.version_name)
+            in_sync = self._state is not None and self._version == seen
+            if in_sync and version == seen + 1 and has_atomic_incr():
+                func(self._state)
+                self._version = version
+            else:
+                self._state = None
+
+    def _drop(self):
+        with self._lock:
+            bump_version(self.version_name)
+            self._state = None
@@ -0,0 +1,27 @@
+import multiprocessing
+
+from django.db import connections
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    finally:
+        connections.close_all()
+
+
+def run_in_other_process(func, *args, **kwargs):
+    """Call ``func`` in a forked worker, like another server process.
+
+    The worker shares the test database and the default cache with this
+    process and nothing else, so use it from a ``TransactionTestCase``
+    for the rows to be seen on both sides.
+    """
+    connections.close_all()
+    process = multiprocessing.get_context("fork").Process(
+        target=_run, args=(func, args, kwargs)
+    )
+    process.start()
+    process.join()
+    if process.exitcode:
+        raise AssertionError(f"Worker process exited with {process.exitcode}")
@@ -0,0 +1,136 @@
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.models import (
+    DailyLoad,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.reservations import book_seats
+
+DAILY_LOAD_LIST_URL = reverse("train-station:dailyload-list")
+
+
+class DailyLoadTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@mail.test"
+        )
+        self.route = Route.objects.create(
+            source=Station.objects.create(
+                name="Lviv", latitude=1, longitude=1
+            ),
+            destination=Station.objects.create(
+                name="Kyiv", latitude=2, longitude=2
+            ),
+            distance=540,
+        )
+        self.intercity = TrainType.objects.create(name="Intercity")
+        self.train = Train.objects.create(
+            name="Express",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=self.intercity,
+        )
+        self.trips = [
+            Trip.objects.create(
+                route=self.route,
+                train=self.train,
+                departure_time=make_aware(datetime(2030, 1, 1, hour)),
+                arrival_time=make_aware(datetime(2030, 1, 1, hour + 4)),
+            )
+            for hour in (6, 12)
+        ]
+
+    def load(self):
+        return DailyLoad.objects.values_list(
+            "date", "trips", "seats", "tickets_sold"
+        ).get()
+
+    def test_trips_and_bookings_update_rollup(self):
+        self.assertEqual(self.load(), (datetime(2030, 1, 1).date(), 2, 40, 0))
+
+        order = Order.objects.create(user=self.user)
+        book_seats(order, [(self.trips[0].pk, 1, 1), (self.trips[1].pk, 1, 1)])
+        Ticket.objects.create(order=order, trip=self.trips[1], cargo=1, seat=2)
+
+        self.assertEqual(self.load()[3], 3)
+
+        order.tickets.filter(seat=2).delete()
+
+        self.assertEqual(self.load()[3], 2)
+
+    def test_rescheduled_trip_moves_to_its_new_day(self):
+        trip = self.trips[1]
+        trip.departure_time = make_aware(datetime(2030, 1, 2, 12))
+        trip.arrival_time = make_aware(datetime(2030, 1, 2, 16))
+        trip.save()
+
+        self.assertEqual(
+            list(DailyLoad.objects.values_list("date", "trips")),
+            [
+                (datetime(2030, 1, 1).date(), 1),
+                (datetime(2030, 1, 2).date(), 1),
+            ],
+        )
+
+        trip.delete()
+
+        self.assertEqual(DailyLoad.objects.count(), 1)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        Ticket.objects.create(
+            order=Order.objects.create(user=self.user),
+            trip=self.trips[0],
+            cargo=1,
+            seat=1,
+        )
+        self.train.cargo_num = 3
+        self.train.save()
+        expected = self.load()
+
+        call_command("rebuild_daily_loads", stdout=StringIO())
+
+        self.assertEqual(self.load(), expected)
+        self.assertEqual(expected[2:], (60, 1))
+
+    def test_daily_load_list_is_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(DAILY_LOAD_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        res = client.get(DAILY_LOAD_LIST_URL, {"start": "2030-01-01"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "id": DailyLoad.objects.get().id,
+                    "date": "2030-01-01",
+                    "route": "Lviv to Kyiv",
+                    "train_type": "Intercity",
+                    "trips": 2,
+                    "seats": 40,
+                    "tickets_sold": 0,
+                    "load_factor": 0.0,
+                }
+            ],
+        )
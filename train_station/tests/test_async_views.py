@@ -0,0 +1,115 @@
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from train_station.async_views import resolve_name_filter
+from train_station.models import Route, Station, Train, TrainType, Trip
+
+TRIP_LIST_URL = reverse("train-station:trip-list")
+ASYNC_TRIP_LIST_URL = reverse("train-station:trip-list-async")
+
+
+def async_detail_url(pk):
+    return reverse("train-station:trip-detail-async", kwargs={"pk": pk})
+
+
+def async_seats_url(pk):
+    return reverse("train-station:trip-seats-async", kwargs={"pk": pk})
+
+
+# Name filters are resolved on separate threads and connections, which
+# only see committed rows.
+class AsyncTripViewTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(email="user@mail.test")
+        token = RefreshToken.for_user(user).access_token
+        self.async_client = AsyncClient()
+        self.headers = {"authorization": f"Bearer {token}"}
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        train = Train.objects.create(
+            name="Express",
+            cargo_num=1,
+            places_in_cargo=4,
+            train_type=TrainType.objects.create(name="Intercity"),
+        )
+        self.trips = [
+            Trip.objects.create(
+                route=Route.objects.create(
+                    source=Station.objects.create(
+                        name=source, latitude=1, longitude=1
+                    ),
+                    destination=Station.objects.create(
+                        name=destination, latitude=2, longitude=2
+                    ),
+                    distance=100,
+                ),
+                train=train,
+                departure_time=make_aware(datetime(2030, 1, day, 8, 0)),
+                arrival_time=make_aware(datetime(2030, 1, day, 12, 0)),
+            )
+            for day, source, destination in (
+                (1, "Lviv", "Kyiv"),
+                (2, "Odesa", "Kyiv"),
+            )
+        ]
+
+    def test_name_filters_are_fetched_where_resolved(self):
+        matches = resolve_name_filter("source", "lviv")
+
+        self.assertEqual(matches, {"source": [self.trips[0].route.source_id]})
+
+    async def test_trip_list_matches_sync_list(self):
+        params = {"source": "lviv", "destination": "kyiv"}
+
+        res = await self.async_client.get(
+            ASYNC_TRIP_LIST_URL, params, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        expected = await self.sync_get(TRIP_LIST_URL, params)
+        self.assertEqual(res.content, expected.content)
+        self.assertEqual(
+            [trip["id"] for trip in res.json()["results"]],
+            [self.trips[0].id],
+        )
+
+    async def test_trip_detail_and_seats(self):
+        trip = self.trips[1]
+
+        res = await self.async_client.get(
+            async_detail_url(trip.id), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["route"]["source"], "Odesa")
+        self.assertEqual(res.json()["tickets_available"], 4)
+
+        res = await self.async_client.get(
+            async_seats_url(trip.id), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["tickets_available"], 4)
+
+    async def test_missing_trip_returns_not_found(self):
+        for url in (async_detail_url(0), async_seats_url(0)):
+            res = await self.async_client.get(url, headers=self.headers)
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_authentication_is_required(self):
+        res = await AsyncClient().get(ASYNC_TRIP_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def sync_get(self, url, params):
+        return await sync_to_async(self.client.get)(url, params)
@@ -0,0 +1,106 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.db import models
+from django.test import TestCase
+
+from train_station.models import Route, Station, Ticket, Train, Trip
+
+
+class GenerateNetworkTest(TestCase):
+    def test_generates_consistent_network(self):
+        call_command(
+            "generate_network",
+            stations=20,
+            trains=5,
+            trips=50,
+            tickets=500,
+            users=10,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Station.objects.count(), 20)
+        self.assertEqual(Trip.objects.count(), 50)
+        self.assertEqual(Ticket.objects.count(), 500)
+        self.assertFalse(
+            Route.objects.filter(source=models.F("destination")).exists()
+        )
+        self.assertFalse(
+            Trip.objects.annotate(sold=models.Count("tickets"))
+            .exclude(tickets_sold=models.F("sold"))
+            .exists()
+        )
+
+
+TIMETABLE_BUNDLE = {
+    "stations.txt": (
+        "station_id,name,latitude,longitude\n"
+        "L,Lviv,49.84,24.03\n"
+        "K,Kyiv,50.45,30.52\n"
+        "K2,Kyiv,50.45,30.52\n"
+        "O,Odesa,46.48,30.72\n"
+    ),
+    "routes.txt": (
+        "route_id,source_id,destination_id,distance\n"
+        "LK,L,K,540\n"
+        "LK2,L,K2,540\n"
+        "KO,K,O,475\n"
+    ),
+    "trains.txt": (
+        "train_id,name,train_type,cargo_num,places_in_cargo\n"
+        "T1,Express,Intercity,5,40\n"
+    ),
+    "trips.txt": (
+        "route_id,train_id,departure_time,arrival_time\n"
+        "LK,T1,2030-01-01T08:00,2030-01-01T13:00\n"
+        "LK2,T1,2030-01-02T08:00,2030-01-02T13:00\n"
+        "KO,T1,2030-01-03T08:00,2030-01-03T14:00\n"
+    ),
+}
+
+
+class ImportTimetableTest(TestCase):
+    def setUp(self):
+        self.odesa = Station.objects.create(
+            name="Odesa", latitude=46.48, longitude=30.72
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.bundle = Path(directory.name)
+        for name, content in TIMETABLE_BUNDLE.items():
+            (self.bundle / name).write_text(content)
+
+    def test_imports_deduplicated_network(self):
+        call_command("import_timetable", self.bundle, stdout=StringIO())
+
+        self.assertEqual(Station.objects.count(), 3)
+        self.assertEqual(Station.objects.filter(name="Odesa").count(), 1)
+        self.assertEqual(Route.objects.count(), 4)
+        self.assertTrue(
+            Route.objects.filter(
+                source__name="Odesa", destination__name="Kyiv"
+            ).exists()
+        )
+        self.assertEqual(Train.objects.count(), 1)
+        self.assertEqual(
+            Trip.objects.filter(
+                route__source__name="Lviv", route__destination__name="Kyiv"
+            ).count(),
+            2,
+        )
+        self.assertEqual(
+            Trip.objects.get(route__destination=self.odesa).train.name,
+            "Express",
+        )
+
+    def test_unknown_reference_rolls_back(self):
+        with open(self.bundle / "trips.txt", "a") as file:
+            file.write("XX,T1,2030-01-04T08:00,2030-01-04T12:00\n")
+
+        with self.assertRaisesMessage(CommandError, "trips line 5"):
+            call_command("import_timetable", self.bundle, stdout=StringIO())
+
+        self.assertEqual(Station.objects.count(), 1)
+        self.assertFalse(Trip.objects.exists())
@@ -0,0 +1,197 @@
+import tempfile
+import threading
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.distances import (
+    UNREACHABLE,
+    DistanceMatrix,
+    compute_distance_matrix,
+    distance_matrix,
+)
+from train_station.models import Route, Station
+
+ROUTE_DISTANCE_URL = reverse("train-station:route-distance")
+
+
+class DistanceMatrixTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f"{directory.name}/1"
+        DistanceMatrix.save(
+            self.path,
+            compute_distance_matrix(
+                [
+                    (10, 20, 100),
+                    (20, 30, 50),
+                    (10, 30, 200),
+                    (10, 30, 180),
+                    (30, 40, 10),
+                ]
+            ),
+        )
+        self.matrix = DistanceMatrix.load(self.path)
+
+    def test_matrix_is_memory_mapped_int32(self):
+        self.assertIsInstance(self.matrix.distances, np.memmap)
+        self.assertEqual(self.matrix.distances.dtype, np.int32)
+        self.assertEqual(self.matrix.next_hops.dtype, np.int32)
+        self.assertTrue(self.matrix.distances.flags["C_CONTIGUOUS"])
+        self.assertEqual(self.matrix.distances.shape, (4, 4))
+
+    def test_lookup_follows_the_shortest_path(self):
+        self.assertEqual(self.matrix.lookup(10, 40), (160, [10, 20, 30, 40]))
+        self.assertEqual(self.matrix.lookup(20, 20), (0, [20]))
+
+    def test_lookup_of_unreachable_or_unknown_stations(self):
+        self.assertEqual(self.matrix.distances[3, 0], UNREACHABLE)
+        self.assertEqual(self.matrix.lookup(40, 10), (None, []))
+        self.assertEqual(self.matrix.lookup(10, 99), (None, []))
+
+
+class RouteDistanceViewTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(
+            override_settings(DISTANCE_MATRIX_DIR=directory.name)
+        )
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(email="user@mail.test")
+        )
+        self.lviv, self.kyiv, self.odesa = (
+            Station.objects.create(name=name, latitude=0, longitude=0)
+            for name in ("Lviv", "Kyiv", "Odesa")
+        )
+        Route.objects.upsert(
+            [(self.lviv, self.kyiv, 540), (self.kyiv, self.odesa, 475)]
+        )
+        self.params = {"source": self.lviv.id, "destination": self.odesa.id}
+        call_command("build_distance_matrix", stdout=StringIO())
+
+    def test_distance_returns_the_path(self):
+        response = self.client.get(ROUTE_DISTANCE_URL, self.params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["distance"], 1015)
+        self.assertEqual(
+            [station["name"] for station in response.data["path"]],
+            ["Lviv", "Kyiv", "Odesa"],
+        )
+
+    def test_route_changes_are_served_once_rebuilt(self):
+        self.client.get(ROUTE_DISTANCE_URL, self.params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Route.objects.create(
+                source=self.lviv, destination=self.odesa, distance=800
+            )
+        self.assertFalse(distance_matrix.is_current())
+        response = self.client.get(ROUTE_DISTANCE_URL, self.params)
+        self.assertEqual(response.data["distance"], 1015)
+        self.assertTrue(response.data["stale"])
+
+        call_command("build_distance_matrix", stdout=StringIO())
+
+        response = self.client.get(ROUTE_DISTANCE_URL, self.params)
+        self.assertEqual(response.data["distance"], 800)
+        self.assertEqual(len(response.data["path"]), 2)
+        self.assertFalse(response.data["stale"])
+
+    def test_path_through_a_deleted_station_is_unavailable(self):
+        self.kyiv.delete()
+
+        response = self.client.get(ROUTE_DISTANCE_URL, self.params)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    def test_build_is_skipped_while_current(self):
+        build, _ = distance_matrix.current()
+
+        out = StringIO()
+        call_command("build_distance_matrix", stdout=out)
+
+        self.assertIn("up to date", out.getvalue())
+        self.assertEqual(distance_matrix.current()[0], build)
+
+    def test_distance_is_unavailable_before_the_first_build(self):
+        with (
+            tempfile.TemporaryDirectory() as empty,
+            override_settings(DISTANCE_MATRIX_DIR=empty),
+        ):
+            response = self.client.get(ROUTE_DISTANCE_URL, self.params)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    def test_distance_of_disconnected_stations(self):
+        minsk = Station.objects.create(name="Minsk", latitude=0, longitude=0)
+        response = self.client.get(
+            ROUTE_DISTANCE_URL,
+            {"source": self.lviv.id, "destination": minsk.id},
+        )
+
+        self.assertIsNone(response.data["distance"])
+        self.assertEqual(response.data["path"], [])
+
+
+@override_settings(DISTANCE_MATRIX_REBUILD_ON_CHANGE=True)
+class DistanceMatrixRebuildTest(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(
+            override_settings(DISTANCE_MATRIX_DIR=directory.name)
+        )
+        cache.clear()
+        self.lviv, self.kyiv = (
+            Station.objects.create(name=name, latitude=0, longitude=0)
+            for name in ("Lviv", "Kyiv")
+        )
+        call_command("build_distance_matrix", stdout=StringIO())
+
+    @staticmethod
+    def wait_for_rebuild():
+        for thread in threading.enumerate():
+            if thread.name == "distance-matrix-builder":
+                thread.join(timeout=30)
+
+    def test_route_changes_rebuild_the_matrix(self):
+        Route.objects.create(
+            source=self.lviv, destination=self.kyiv, distance=540
+        )
+        self.wait_for_rebuild()
+
+        self.assertTrue(distance_matrix.is_current())
+        self.assertEqual(
+            distance_matrix.get().lookup(self.lviv.id, self.kyiv.id),
+            (540, [self.lviv.id, self.kyiv.id]),
+        )
+
+    def test_rebuild_waits_for_the_running_build(self):
+        with distance_matrix.build_lock():
+            Route.objects.create(
+                source=self.lviv, destination=self.kyiv, distance=540
+            )
+            self.wait_for_rebuild()
+
+            self.assertFalse(distance_matrix.is_current())
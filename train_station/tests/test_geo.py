@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.geo import StationGrid
+from train_station.models import Station
+
+STATION_NEARBY_URL = reverse("train-station:station-nearby")
+
+
+class StationGridTest(SimpleTestCase):
+    def setUp(self):
+        self.grid = StationGrid(
+            [
+                (1, "Lviv", 49.8397, 24.0297),
+                (2, "Vynnyky", 49.8156, 24.1297),
+                (3, "Kyiv", 50.4501, 30.5234),
+                (4, "Suva", -18.1416, 178.4419),
+                (5, "Apia", -13.8333, -171.7667),
+            ]
+        )
+
+    def test_nearby_is_sorted_and_limited_by_radius(self):
+        stations = self.grid.nearby(49.84, 24.03, 20, 10)
+
+        self.assertEqual([station["id"] for station in stations], [1, 2])
+        self.assertLess(stations[0]["distance_km"], 0.1)
+        self.assertAlmostEqual(stations[1]["distance_km"], 7.6, delta=0.1)
+
+    def test_nearby_returns_at_most_k_stations(self):
+        stations = self.grid.nearby(49.84, 24.03, 1000, 2)
+
+        self.assertEqual([station["id"] for station in stations], [1, 2])
+
+    def test_nearby_crosses_the_antimeridian(self):
+        stations = self.grid.nearby(-16, 180, 1500, 10)
+
+        self.assertEqual([station["id"] for station in stations], [4, 5])
+
+
+class StationNearbyViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(email="user@mail.test")
+        )
+
+    def test_nearby_follows_station_changes(self):
+        params = {"lat": 49.84, "lon": 24.03, "radius": 5}
+        self.client.get(STATION_NEARBY_URL, params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lviv = Station.objects.create(
+                name="Lviv", latitude=49.8397, longitude=24.0297
+            )
+
+        res = self.client.get(STATION_NEARBY_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([station["id"] for station in res.data], [lviv.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lviv.delete()
+
+        res = self.client.get(STATION_NEARBY_URL, params)
+        self.assertEqual(res.data, [])
+
+    def test_nearby_validates_query(self):
+        res = self.client.get(STATION_NEARBY_URL, {"lat": 91, "lon": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("lat", res.data)
@@ -0,0 +1,161 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.journeys import Timetable
+from train_station.models import Route, Station, Train, TrainType, Trip
+from train_station.tests.processes import run_in_other_process
+
+JOURNEY_URL = reverse("train-station:journey-list")
+HOUR = 3600
+
+
+class TimetablePlanTests(SimpleTestCase):
+    def setUp(self):
+        # Stations 1 -> 2 -> 3 -> 4 plus a slow direct trip 1 -> 4.
+        self.timetable = Timetable(
+            [
+                (10, 1, 2, 0 * HOUR, 1 * HOUR),
+                (11, 2, 3, 2 * HOUR, 3 * HOUR),
+                (12, 3, 4, 4 * HOUR, 5 * HOUR),
+                (13, 1, 4, 1 * HOUR, 8 * HOUR),
+                (14, 2, 4, 1 * HOUR + 60, 9 * HOUR),
+            ]
+        )
+
+    def trips(self, journey):
+        return [leg[0] for leg in journey]
+
+    def test_earliest_arrival_and_fewest_transfers(self):
+        journeys = self.timetable.plan(1, 4, 0)
+
+        self.assertEqual(
+            self.trips(journeys["earliest_arrival"]), [10, 11, 12]
+        )
+        self.assertEqual(self.trips(journeys["fewest_transfers"]), [13])
+
+    def test_min_transfer_time_is_respected(self):
+        journeys = self.timetable.plan(1, 4, 0, min_transfer=30 * 60)
+
+        self.assertNotIn(14, self.trips(journeys["earliest_arrival"]))
+
+        journeys = self.timetable.plan(1, 4, 0, min_transfer=0)
+
+        self.assertEqual(
+            self.trips(journeys["earliest_arrival"]), [10, 11, 12]
+        )
+
+    def test_max_transfers_limits_journeys(self):
+        journeys = self.timetable.plan(1, 4, 0, max_transfers=0)
+
+        self.assertEqual(self.trips(journeys["earliest_arrival"]), [13])
+
+    def test_incremental_updates(self):
+        self.timetable.remove(13)
+        self.timetable.add(15, 1, 4, 30 * 60, 2 * HOUR)
+
+        journeys = self.timetable.plan(1, 4, 0)
+
+        self.assertEqual(self.trips(journeys["earliest_arrival"]), [15])
+        self.assertEqual(len(self.timetable), 5)
+
+    def test_unreachable_destination(self):
+        self.assertEqual(self.timetable.plan(4, 1, 0), {})
+
+
+class JourneyNetworkMixin:
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(email="user@mail.test")
+        )
+        stations = [
+            Station.objects.create(name=name, latitude=1, longitude=1)
+            for name in ("Lviv", "Kyiv", "Dnipro")
+        ]
+        train = Train.objects.create(
+            name="Express",
+            cargo_num=1,
+            places_in_cargo=1,
+            train_type=TrainType.objects.create(name="Intercity"),
+        )
+        self.trips = [
+            Trip.objects.create(
+                route=Route.objects.create(
+                    source=source, destination=destination, distance=100
+                ),
+                train=train,
+                departure_time=make_aware(datetime(2030, 1, 1, hour, 0)),
+                arrival_time=make_aware(datetime(2030, 1, 1, hour + 2, 0)),
+            )
+            for source, destination, hour in (
+                (stations[0], stations[1], 8),
+                (stations[1], stations[2], 11),
+            )
+        ]
+        self.stations = stations
+
+
+class JourneyViewTests(JourneyNetworkMixin, TestCase):
+    def test_plan_journey_with_transfer(self):
+        res = self.client.get(
+            JOURNEY_URL,
+            {
+                "source": self.stations[0].id,
+                "destination": self.stations[2].id,
+                "departure": "2030-01-01T07:00:00Z",
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        journey = res.data["earliest_arrival"]
+        self.assertEqual(journey["transfers"], 1)
+        self.assertEqual(journey["departure_time"], "2030-01-01 08:00")
+        self.assertEqual(journey["arrival_time"], "2030-01-01 13:00")
+        self.assertEqual(
+            [leg["trip"] for leg in journey["legs"]],
+            [trip.id for trip in self.trips],
+        )
+        self.assertEqual(journey["legs"][1]["source"], "Kyiv")
+
+    def test_source_and_destination_are_required(self):
+        res = self.client.get(JOURNEY_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SharedTimetableTests(JourneyNetworkMixin, TransactionTestCase):
+    def plan(self):
+        res = self.client.get(
+            JOURNEY_URL,
+            {
+                "source": self.stations[0].id,
+                "destination": self.stations[2].id,
+                "departure": "2030-01-01T07:00:00Z",
+            },
+        )
+        return [leg["trip"] for leg in res.data["fewest_transfers"]["legs"]]
+
+    def test_trips_added_by_other_processes_are_planned(self):
+        self.assertEqual(self.plan(), [trip.id for trip in self.trips])
+
+        run_in_other_process(
+            Trip.objects.create,
+            route=Route.objects.create(
+                source=self.stations[0],
+                destination=self.stations[2],
+                distance=200,
+            ),
+            train=self.trips[0].train,
+            departure_time=make_aware(datetime(2030, 1, 1, 9, 0)),
+            arrival_time=make_aware(datetime(2030, 1, 1, 14, 0)),
+        )
+
+        direct = Trip.objects.latest("pk")
+        self.assertEqual(self.plan(), [direct.id])
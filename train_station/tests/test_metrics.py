@@ -0,0 +1,120 @@
+import time
+from ipaddress import ip_network
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from psycopg_pool import ConnectionPool
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.models import Station
+from train_station.projections import Projection
+from train_station_service.metrics import expose_pools
+
+STATION_LIST_URL = reverse("train-station:station-list")
+TRIP_LIST_URL = reverse("train-station:trip-list")
+METRICS_URL = reverse("metrics")
+
+
+def server_timings(response):
+    return dict(
+        entry.split(";", 1) for entry in response["Server-Timing"].split(", ")
+    )
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(email="user@mail.test")
+        )
+        Station.objects.create(name="Lviv", latitude=1, longitude=1)
+
+    def test_server_timing_header(self):
+        res = self.client.get(STATION_LIST_URL)
+
+        timings = server_timings(res)
+        self.assertEqual(set(timings), {"db", "serialize", "render", "total"})
+        self.assertIn('desc="1 queries"', timings["db"])
+
+    def test_view_time_counts_as_serialization(self):
+        res = self.client.get(STATION_LIST_URL)
+
+        serialize = server_timings(res)["serialize"]
+        self.assertGreater(float(serialize.removeprefix("dur=")), 0)
+
+    def test_projection_time_counts_as_serialization(self):
+        serialize = Projection.serialize
+
+        def slow_serialize(projection, rows):
+            time.sleep(0.05)
+            return serialize(projection, rows)
+
+        with mock.patch.object(Projection, "serialize", slow_serialize):
+            res = self.client.get(TRIP_LIST_URL)
+
+        timing = server_timings(res)["serialize"]
+        self.assertGreaterEqual(float(timing.removeprefix("dur=")), 50)
+
+    @override_settings(METRICS_ALLOWED_NETWORKS=[ip_network("10.0.0.0/8")])
+    def test_metrics_endpoint_exposes_histograms(self):
+        self.client.get(STATION_LIST_URL)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="10.1.2.3")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn(
+            "train_station_request_duration_seconds_count"
+            '{view="StationViewSet.list",method="GET"}',
+            body,
+        )
+        self.assertIn(
+            "train_station_request_queries_bucket"
+            '{view="StationViewSet.list",method="GET",le="+Inf"}',
+            body,
+        )
+
+    @override_settings(METRICS_ALLOWED_NETWORKS=[ip_network("10.0.0.0/8")])
+    def test_metrics_endpoint_is_restricted(self):
+        for address in ("192.0.2.1", "127.0.0.1", "localhost", "0.0.0.0"):
+            with self.subTest(address=address):
+                res = self.client.get(METRICS_URL, REMOTE_ADDR=address)
+
+                self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_endpoint_allows_staff(self):
+        self.client.force_login(
+            get_user_model().objects.create_user(
+                email="staff@mail.test", is_staff=True
+            )
+        )
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR="192.0.2.1")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class PoolMetricsTests(SimpleTestCase):
+    def test_expose_pool_statistics(self):
+        pool = ConnectionPool(min_size=2, max_size=8, open=False)
+
+        body = expose_pools({"default": pool})
+
+        self.assertIn(
+            "# TYPE train_station_db_pool_checkouts_total counter", body
+        )
+        self.assertIn(
+            'train_station_db_pool_connections_max{alias="default"} 8', body
+        )
+        self.assertIn(
+            'train_station_db_pool_wait_seconds_total{alias="default"} 0.0',
+            body,
+        )
+
+    def test_no_pools_expose_nothing(self):
+        self.assertEqual(expose_pools({}), "")
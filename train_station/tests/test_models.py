@@ -1,3 +1,6 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -73,6 +76,34 @@ class RouteModelTest(BaseTestCase):
         self.assertEqual(Route.objects.count(), 2)
         self.assertEqual(reverse_route.count(), 1)
 
+    def test_upsert_writes_both_directions(self):
+        station_c = Station.objects.create(
+            name="Station C", latitude=3, longitude=3
+        )
+
+        with self.assertNumQueries(3):
+            Route.objects.upsert(
+                [
+                    (self.station_a, self.station_b, 120),
+                    (self.station_b.pk, station_c.pk, 80),
+                    (station_c, self.station_b, 90),
+                ]
+            )
+
+        distances = {
+            (route.source_id, route.destination_id): route.distance
+            for route in Route.objects.all()
+        }
+        self.assertEqual(
+            distances,
+            {
+                (self.station_a.pk, self.station_b.pk): 120,
+                (self.station_b.pk, self.station_a.pk): 120,
+                (self.station_b.pk, station_c.pk): 80,
+                (station_c.pk, self.station_b.pk): 90,
+            },
+        )
+
 
 class TripModelTest(BaseTestCase):
     def test_trip_str(self):
@@ -114,3 +145,37 @@ class TicketModelTest(BaseTestCase):
             str(ticket),
             f"{self.trip} (cargo: {ticket.cargo}, seat: {ticket.seat})",
         )
+
+
+class TripTicketsSoldTest(BaseTestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="testuser@example.com")
+        self.trip = Trip.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=timezone.now(),
+            arrival_time=timezone.now() + timezone.timedelta(hours=2),
+        )
+        self.order = Order.objects.create(user=self.user)
+
+    def test_ticket_create_and_delete_update_counter(self):
+        ticket = Ticket.objects.create(
+            cargo=1, seat=1, trip=self.trip, order=self.order
+        )
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 1)
+
+        ticket.delete()
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        Ticket.objects.create(
+            cargo=1, seat=1, trip=self.trip, order=self.order
+        )
+        Trip.objects.filter(pk=self.trip.pk).update(tickets_sold=42)
+
+        call_command("reconcile_tickets_sold", stdout=StringIO())
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 1)
@@ -0,0 +1,178 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station.models import (
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.tests.processes import run_in_other_process
+from train_station_service.replicas import ReplicaRouter, read_alias
+
+TRIP_LIST_URL = reverse("train-station:trip-list")
+ORDER_LIST_URL = reverse("train-station:order-list")
+ORDER_EXPORT_URL = reverse("train-station:order-export")
+
+
+def sample_trip():
+    departure = timezone.now() + timedelta(days=1)
+    return Trip.objects.create(
+        route=Route.objects.create(
+            source=Station.objects.create(name="A", latitude=1, longitude=1),
+            destination=Station.objects.create(
+                name="B", latitude=2, longitude=2
+            ),
+            distance=100,
+        ),
+        train=Train.objects.create(
+            name="Express",
+            cargo_num=1,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Intercity"),
+        ),
+        departure_time=departure,
+        arrival_time=departure + timedelta(hours=2),
+    )
+
+
+def token_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+    )
+    return client
+
+
+def place_order(user_id, trip_id):
+    res = token_client(get_user_model().objects.get(pk=user_id)).post(
+        ORDER_LIST_URL,
+        {"tickets": [{"trip": trip_id, "cargo": 1, "seat": 1}]},
+        format="json",
+    )
+    assert res.status_code == status.HTTP_201_CREATED, res.data
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """The replica test database stays empty, so rows written to the
+    primary show which database a request read from."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@mail.test", password="password"
+        )
+        self.client = token_client(self.user)
+        self.trip = sample_trip()
+
+    def trip_ids(self):
+        res = self.client.get(TRIP_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [trip["id"] for trip in res.data["results"]]
+
+    def test_safe_requests_read_from_replica(self):
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            self.assertEqual(self.trip_ids(), [])
+
+        self.assertTrue(
+            any(
+                Trip._meta.db_table in query["sql"]
+                for query in replica.captured_queries
+            )
+        )
+
+    def test_writes_go_to_primary(self):
+        token = read_alias.set("replica")
+        try:
+            self.assertEqual(ReplicaRouter().db_for_read(Trip), "replica")
+            self.assertEqual(ReplicaRouter().db_for_write(Trip), "default")
+        finally:
+            read_alias.reset(token)
+
+    def test_order_pins_client_to_primary(self):
+        res = self.client.post(
+            ORDER_LIST_URL,
+            {"tickets": [{"trip": self.trip.id, "cargo": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.trip_ids(), [self.trip.id])
+
+        other = token_client(
+            get_user_model().objects.create_user(
+                email="other@mail.test", password="password"
+            )
+        )
+        self.assertEqual(other.get(TRIP_LIST_URL).data["results"], [])
+
+    @override_settings(REPLICA_PIN_WINDOW=timedelta(0))
+    def test_pin_expires_after_window(self):
+        self.client.post(
+            ORDER_LIST_URL,
+            {"tickets": [{"trip": self.trip.id, "cargo": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(self.trip_ids(), [])
+
+    def test_streamed_export_reads_from_replica(self):
+        place_order(self.user.id, self.trip.id)
+        staff = get_user_model().objects.create_user(
+            email="staff@mail.test", password="password", is_staff=True
+        )
+        tomorrow = timezone.now() + timedelta(days=1)
+        res = token_client(staff).get(
+            ORDER_EXPORT_URL,
+            {"start": "2000-01-01", "end": tomorrow.date().isoformat()},
+        )
+
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            content = b"".join(res.streaming_content)
+
+        self.assertTrue(
+            any(
+                Ticket._meta.db_table in query["sql"]
+                for query in replica.captured_queries
+            )
+        )
+        self.assertEqual(len(content.splitlines()), 1)
+
+    def test_requests_without_replicas_read_from_primary(self):
+        with override_settings(REPLICA_DATABASES=[]):
+            self.assertEqual(self.trip_ids(), [self.trip.id])
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class SharedReplicaPinTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def test_pin_reaches_other_processes(self):
+        user = get_user_model().objects.create_user(
+            email="user@mail.test", password="password"
+        )
+        trip = sample_trip()
+        client = token_client(user)
+        self.assertEqual(client.get(TRIP_LIST_URL).data["results"], [])
+
+        run_in_other_process(place_order, user.id, trip.id)
+
+        res = client.get(TRIP_LIST_URL)
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [trip.id]
+        )
@@ -0,0 +1,225 @@
+import threading
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station.models import (
+    Route,
+    SeatHold,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+
+HOLD_LIST_URL = reverse("train-station:seathold-list")
+ORDER_LIST_URL = reverse("train-station:order-list")
+
+
+def sample_trip(cargo_num=1, places_in_cargo=10):
+    route = Route.objects.create(
+        source=Station.objects.create(name="A", latitude=1, longitude=1),
+        destination=Station.objects.create(name="B", latitude=2, longitude=2),
+        distance=100,
+    )
+    train = Train.objects.create(
+        name="Express",
+        cargo_num=cargo_num,
+        places_in_cargo=places_in_cargo,
+        train_type=TrainType.objects.create(name="Intercity"),
+    )
+    return Trip.objects.create(
+        route=route,
+        train=train,
+        departure_time=make_aware(datetime(2024, 11, 19, 8, 0)),
+        arrival_time=make_aware(datetime(2024, 11, 19, 12, 0)),
+    )
+
+
+def hold_detail_url(hold_id):
+    return reverse("train-station:seathold-detail", args=[hold_id])
+
+
+def trip_seats_url(trip_id):
+    return reverse("train-station:trip-seats", args=[trip_id])
+
+
+def authenticated_client(email):
+    client = APIClient()
+    client.force_authenticate(
+        get_user_model().objects.create_user(email=email)
+    )
+    return client
+
+
+class SeatHoldTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trip = sample_trip()
+        self.client = authenticated_client("first@mail.test")
+        self.other_client = authenticated_client("second@mail.test")
+        self.seat = {"trip": self.trip.id, "cargo": 1, "seat": 1}
+
+    def test_order_confirms_hold(self):
+        res = self.client.post(
+            HOLD_LIST_URL, {"seats": [self.seat]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.post(
+            ORDER_LIST_URL, {"hold": res.data["id"]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.filter(trip=self.trip).count(), 1)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_held_seat_is_unavailable_to_others(self):
+        self.client.post(HOLD_LIST_URL, {"seats": [self.seat]}, format="json")
+
+        res = self.other_client.post(
+            ORDER_LIST_URL, {"tickets": [self.seat]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+        res = self.other_client.post(
+            HOLD_LIST_URL, {"seats": [self.seat]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_expired_hold_releases_seat(self):
+        res = self.client.post(
+            HOLD_LIST_URL, {"seats": [self.seat]}, format="json"
+        )
+        SeatHold.objects.update(
+            expires_at=make_aware(datetime.now()) - timedelta(seconds=1)
+        )
+
+        res = self.client.post(
+            ORDER_LIST_URL, {"hold": res.data["id"]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+        res = self.other_client.post(
+            ORDER_LIST_URL, {"tickets": [self.seat]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_taken_seat_is_a_conflict(self):
+        self.client.post(
+            ORDER_LIST_URL, {"tickets": [self.seat]}, format="json"
+        )
+
+        res = self.other_client.post(
+            ORDER_LIST_URL, {"tickets": [self.seat]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("already taken", res.data["detail"])
+
+    def test_seat_map_shows_held_seats(self):
+        res = self.client.get(trip_seats_url(self.trip.id))
+        self.assertEqual(res.data["cargos"], ["AAA="])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hold = self.client.post(
+                HOLD_LIST_URL, {"seats": [self.seat]}, format="json"
+            )
+        res = self.client.get(trip_seats_url(self.trip.id))
+        self.assertEqual(res.data["cargos"], ["gAA="])
+        self.assertEqual(res.data["tickets_available"], 9)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(hold_detail_url(hold.data["id"]))
+        res = self.client.get(trip_seats_url(self.trip.id))
+        self.assertEqual(res.data["cargos"], ["AAA="])
+
+    def test_booking_releases_expired_holds(self):
+        self.client.post(HOLD_LIST_URL, {"seats": [self.seat]}, format="json")
+        SeatHold.objects.update(
+            expires_at=make_aware(datetime.now()) - timedelta(seconds=1)
+        )
+
+        res = self.other_client.post(
+            ORDER_LIST_URL,
+            {"tickets": [{**self.seat, "seat": 2}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_cannot_confirm_hold_of_other_user(self):
+        res = self.client.post(
+            HOLD_LIST_URL, {"seats": [self.seat]}, format="json"
+        )
+
+        res = self.other_client.post(
+            ORDER_LIST_URL, {"hold": res.data["id"]}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    clients_num = 16
+
+    def book_concurrently(self, seats):
+        clients = [
+            authenticated_client(f"user{i}@mail.test")
+            for i in range(self.clients_num)
+        ]
+        responses = [None] * self.clients_num
+        barrier = threading.Barrier(self.clients_num)
+
+        def book(i):
+            try:
+                barrier.wait()
+                responses[i] = clients[i].post(
+                    ORDER_LIST_URL, {"tickets": [seats[i]]}, format="json"
+                )
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=book, args=(i,))
+            for i in range(self.clients_num)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return [response.status_code for response in responses]
+
+    def test_many_clients_race_for_one_seat(self):
+        trip = sample_trip()
+        seat = {"trip": trip.id, "cargo": 1, "seat": 1}
+
+        codes = self.book_concurrently([seat] * self.clients_num)
+
+        self.assertEqual(codes.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(
+            codes.count(status.HTTP_409_CONFLICT), self.clients_num - 1
+        )
+        trip.refresh_from_db()
+        self.assertEqual(trip.tickets_sold, 1)
+
+    def test_many_clients_book_distinct_seats(self):
+        trip = sample_trip(places_in_cargo=self.clients_num)
+        seats = [
+            {"trip": trip.id, "cargo": 1, "seat": seat}
+            for seat in range(1, self.clients_num + 1)
+        ]
+
+        codes = self.book_concurrently(seats)
+
+        self.assertEqual(codes, [status.HTTP_201_CREATED] * self.clients_num)
+        trip.refresh_from_db()
+        self.assertEqual(trip.tickets_sold, self.clients_num)
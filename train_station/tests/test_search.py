@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+
+from train_station.search import NameIndex
+
+
+class NameIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = NameIndex(
+            [(1, "Kyiv-Pasazhyrskyi"), (2, "Lviv"), (3, "Kyivska Oblast")]
+        )
+
+    def test_contains_is_case_insensitive_substring(self):
+        self.assertEqual(self.index.contains("KYIV"), {1, 3})
+        self.assertEqual(self.index.contains("iv"), {1, 2, 3})
+        self.assertEqual(self.index.contains("sazh"), {1})
+        self.assertEqual(self.index.contains("Odesa"), set())
+
+    def test_startswith_matches_word_prefixes(self):
+        self.assertEqual(self.index.startswith("kyiv"), [1, 3])
+        self.assertEqual(self.index.startswith("pas"), [1])
+        self.assertEqual(self.index.startswith("viv"), [])
+
+    def test_add_and_remove(self):
+        self.index.remove(2)
+        self.index.add(1, "Odesa-Holovna")
+
+        self.assertEqual(self.index.contains("iv"), {3})
+        self.assertEqual(self.index.startswith("hol"), [1])
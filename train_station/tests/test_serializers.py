@@ -1,9 +1,22 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.utils.timezone import now
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
 from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
 from train_station.models import Station, Route, Trip, TrainType, Train
-from train_station.serializers import RouteSerializer, OrderSerializer
+from train_station.projections import DateTime, FastJSONRenderer
+from train_station.reservations import SeatUnavailable
+from train_station.serializers import (
+    RouteSerializer,
+    OrderSerializer,
+    TripListSerializer,
+    TRIP_LIST_PROJECTION,
+)
+from train_station.views import TripViewSet
 from user.models import User
 
 
@@ -108,3 +121,130 @@ class OrderSerializerCreateTestCase(TestCase):
         self.assertFalse(serializer.is_valid())
 
         self.assertIn("trip", serializer.errors["tickets"][0])
+
+    def test_create_order_with_out_of_range_seat(self):
+        for cargo, seat in ((6, 1), (1, 101), (0, 1)):
+            ticket = {"cargo": cargo, "seat": seat, "trip": self.trip.id}
+            order_data = {"tickets": [ticket]}
+            serializer = OrderSerializer(data=order_data)
+            self.assertFalse(serializer.is_valid())
+            self.assertIn("tickets", serializer.errors)
+
+    def test_create_order_with_duplicate_or_taken_seat(self):
+        ticket = {"cargo": 1, "seat": 1, "trip": self.trip.id}
+
+        serializer = OrderSerializer(data={"tickets": [ticket, ticket]})
+        self.assertFalse(serializer.is_valid())
+
+        serializer = OrderSerializer(data={"tickets": [ticket]})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=self.user)
+
+        serializer = OrderSerializer(data={"tickets": [ticket]})
+        with self.assertRaisesMessage(SeatUnavailable, "already taken"):
+            serializer.is_valid()
+
+    def test_create_order_query_count_does_not_grow_with_tickets(self):
+        def place_order(seats):
+            tickets = [
+                {"cargo": 2, "seat": seat, "trip": self.trip.id}
+                for seat in seats
+            ]
+            serializer = OrderSerializer(data={"tickets": tickets})
+            serializer.is_valid(raise_exception=True)
+            serializer.save(user=self.user)
+
+        with CaptureQueriesContext(connection) as single:
+            place_order([1])
+        with CaptureQueriesContext(connection) as group:
+            place_order(range(2, 52))
+
+        self.assertEqual(len(single), len(group))
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 51)
+
+    def test_delete_order_query_count_does_not_grow_with_tickets(self):
+        def place_order(seats):
+            tickets = [
+                {"cargo": 2, "seat": seat, "trip": self.trip.id}
+                for seat in seats
+            ]
+            serializer = OrderSerializer(data={"tickets": tickets})
+            serializer.is_valid(raise_exception=True)
+            return serializer.save(user=self.user)
+
+        single, group = place_order([1]), place_order(range(2, 52))
+        with CaptureQueriesContext(connection) as single_queries:
+            single.delete()
+        with CaptureQueriesContext(connection) as group_queries:
+            group.delete()
+
+        self.assertEqual(len(single_queries), len(group_queries))
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 0)
+
+
+class TripListProjectionTestCase(TestCase):
+    def setUp(self):
+        stations = [
+            Station.objects.create(name=name, latitude=1.5, longitude=-2.25)
+            for name in ("Львів", 'Kyiv "Central"', "Line\u2028Sep", "Ñ\\")
+        ]
+        train_type = TrainType.objects.create(name="Intercity+")
+        departure = now().replace(microsecond=123456)
+        for index, (source, destination) in enumerate(
+            zip(stations, stations[1:] + stations[:1])
+        ):
+            train = Train.objects.create(
+                name=f"Train {index}",
+                cargo_num=2,
+                places_in_cargo=30,
+                train_type=train_type,
+            )
+            Trip.objects.create(
+                route=Route.objects.create(
+                    source=source, destination=destination, distance=10
+                ),
+                train=train,
+                departure_time=departure + timedelta(hours=index * 7),
+                arrival_time=departure + timedelta(hours=index * 7 + 5),
+                tickets_sold=index,
+            )
+
+    def test_output_is_byte_compatible_with_serializer(self):
+        queryset = TripViewSet.queryset.order_by("departure_time", "id")
+        for zone in ("UTC", "Europe/Kyiv", "America/St_Johns"):
+            with self.subTest(zone=zone), timezone.override(zone):
+                expected = JSONRenderer().render(
+                    TripListSerializer(queryset, many=True).data
+                )
+                actual = FastJSONRenderer().render(
+                    TRIP_LIST_PROJECTION.serialize(
+                        TRIP_LIST_PROJECTION.values(queryset)
+                    )
+                )
+                self.assertEqual(actual, expected)
+
+
+class DateTimeProjectionTest(SimpleTestCase):
+    def test_output_matches_strftime(self):
+        # Newfoundland is half an hour off UTC and changes it in spring.
+        zone = ZoneInfo("America/St_Johns")
+        start = datetime(2030, 3, 9, 22, 7, 31, tzinfo=dt_timezone.utc)
+        values = [start + timedelta(minutes=13 * step) for step in range(500)]
+        for output_format in (
+            "%Y-%m-%d %H:%M",
+            "%a %d %b, %H:%M:%S",
+            "{%j} %H.%M",
+            "{%H}h %M%%",
+        ):
+            with self.subTest(output_format=output_format):
+                convert = DateTime("at", output_format).converter(zone)
+                self.assertEqual(
+                    [convert({"at": value}) for value in values],
+                    [
+                        value.astimezone(zone).strftime(output_format)
+                        for value in values
+                    ],
+                )
+                self.assertIsNone(convert({"at": None}))
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from train_station.snapshots import LocalSnapshot
+
+
+class CountingSnapshot(LocalSnapshot):
+    version_name = "test-snapshot"
+
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return ["built"]
+
+
+class LocalSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.snapshot = CountingSnapshot()
+        self.snapshot.get()
+
+    def update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.snapshot.update(lambda state: state.append("applied"))
+        return self.snapshot.get()
+
+    def test_changes_are_applied_in_place_with_atomic_incr(self):
+        with mock.patch(
+            "train_station.snapshots.has_atomic_incr", return_value=True
+        ):
+            state = self.update()
+
+        self.assertEqual(state, ["built", "applied"])
+        self.assertEqual(self.snapshot.builds, 1)
+
+    def test_changes_rebuild_without_atomic_incr(self):
+        state = self.update()
+
+        self.assertEqual(state, ["built"])
+        self.assertEqual(self.snapshot.builds, 2)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+
+from train_station.models import ThrottleCounter
+from train_station.throttling import SlidingWindowThrottleMixin
+from train_station_service.replicas import read_alias
+
+
+class SampleThrottle(SlidingWindowThrottleMixin, SimpleRateThrottle):
+    rate = "3/min"
+
+    def __init__(self, now):
+        super().__init__()
+        self.now = now
+
+    def timer(self):
+        return self.now
+
+    def get_cache_key(self, request, view):
+        return "throttle_sample_client"
+
+
+class CacheThrottleStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def requests(self, now, count):
+        throttle = SampleThrottle(now)
+        return [throttle.allow_request(None, None) for _ in range(count)]
+
+    def test_limits_requests_within_window(self):
+        self.assertEqual(self.requests(60, 4), [True, True, True, False])
+
+        throttle = SampleThrottle(70)
+        self.assertFalse(throttle.allow_request(None, None))
+        self.assertEqual(throttle.wait(), 50)
+
+    def test_previous_window_decays(self):
+        self.requests(60, 3)
+
+        # Half of the previous window still counts: 1.5 + 1, then 1.5 + 2.
+        self.assertEqual(self.requests(150, 2), [True, False])
+        self.assertEqual(self.requests(170, 1), [True])
+
+    def test_denied_requests_are_not_counted(self):
+        self.requests(60, 10)
+
+        self.assertEqual(self.requests(120, 3), [False, False, False])
+        self.assertEqual(self.requests(179, 1), [True])
+
+    def test_reset_forgets_client(self):
+        self.requests(60, 3)
+
+        SampleThrottle(90).reset("throttle_sample_client")
+
+        self.assertEqual(self.requests(90, 3), [True, True, True])
+
+
+@override_settings(
+    THROTTLE_STORE="train_station.throttling.DatabaseThrottleStore"
+)
+class DatabaseThrottleStoreTests(CacheThrottleStoreTests):
+    databases = {"default", "replica"}
+
+    def test_keeps_two_windows_per_client(self):
+        for now in (60, 120, 180, 240):
+            self.requests(now, 1)
+
+        self.assertEqual(
+            list(ThrottleCounter.objects.values_list("window", "count")),
+            [(3, 1), (4, 1)],
+        )
+
+    def test_starting_a_window_deletes_expired_counters(self):
+        ThrottleCounter.objects.create(
+            key="throttle_other_client",
+            window=1,
+            count=3,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.requests(60, 1)
+
+        self.assertEqual(
+            list(ThrottleCounter.objects.values_list("key", flat=True)),
+            ["throttle_sample_client"],
+        )
+
+    def test_counts_are_read_from_primary(self):
+        token = read_alias.set("replica")
+        try:
+            self.assertEqual(self.requests(60, 4), [True, True, True, False])
+        finally:
+            read_alias.reset(token)
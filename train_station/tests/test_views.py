@@ -1,21 +1,36 @@
+import json
 from datetime import datetime
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.utils.timezone import make_aware
 
-from train_station.models import TrainType, Train, Station, Route, Trip, Order
+from train_station.models import (
+    TrainType,
+    Train,
+    Station,
+    Route,
+    Trip,
+    Order,
+    Ticket,
+    Crew,
+)
 from train_station.serializers import TripListSerializer
+from train_station.tests.processes import run_in_other_process
 
 CREW_LIST_URL = reverse("train-station:crew-list")
 TRAIN_LIST_URL = reverse("train-station:train-list")
 STATION_LIST_URL = reverse("train-station:station-list")
 ROUTE_LIST_URL = reverse("train-station:route-list")
+ROUTE_BULK_URL = reverse("train-station:route-bulk")
 TRIP_LIST_URL = reverse("train-station:trip-list")
 ORDER_LIST_URL = reverse("train-station:order-list")
+STATION_AUTOCOMPLETE_URL = reverse("train-station:station-autocomplete")
+ORDER_EXPORT_URL = reverse("train-station:order-export")
 
 
 def sample_train(**params):
@@ -75,6 +90,14 @@ def detail_url(view_name, pk):
     return reverse(f"train-station:{view_name}-detail", kwargs={"pk": pk})
 
 
+def seats_url(trip_id):
+    return reverse("train-station:trip-seats", kwargs={"pk": trip_id})
+
+
+def crew_conflicts_url(crew_id):
+    return reverse("train-station:crew-conflicts", kwargs={"pk": crew_id})
+
+
 class UnauthenticatedTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -98,6 +121,7 @@ class UnauthenticatedTests(TestCase):
 
 class AuthenticatedTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             email="user@mail.test", password="password"
@@ -134,7 +158,9 @@ class AuthenticatedTests(TestCase):
         serializer1 = TripListSerializer(trip1)
         serializer2 = TripListSerializer(trip2)
         serializer3 = TripListSerializer(trip3)
-        res_data = [remove_tickets_available(item) for item in res.data]
+        res_data = [
+            remove_tickets_available(item) for item in res.data["results"]
+        ]
 
         self.assertIn(serializer1.data, res_data)
         self.assertIn(serializer2.data, res_data)
@@ -165,14 +191,18 @@ class AuthenticatedTests(TestCase):
         serializer3 = TripListSerializer(trip3)
 
         res = self.client.get(TRIP_LIST_URL, {"source": "station"})
-        res_data = [remove_tickets_available(item) for item in res.data]
+        res_data = [
+            remove_tickets_available(item) for item in res.data["results"]
+        ]
 
         self.assertIn(serializer1.data, res_data)
         self.assertIn(serializer2.data, res_data)
         self.assertNotIn(serializer3.data, res_data)
 
         res = self.client.get(TRIP_LIST_URL, {"destination": "station"})
-        res_data = [remove_tickets_available(item) for item in res.data]
+        res_data = [
+            remove_tickets_available(item) for item in res.data["results"]
+        ]
 
         self.assertIn(serializer1.data, res_data)
         self.assertIn(serializer2.data, res_data)
@@ -198,19 +228,63 @@ class AuthenticatedTests(TestCase):
         serializer3 = TripListSerializer(trip3)
 
         res = self.client.get(TRIP_LIST_URL, {"departure": "2024-11-25"})
-        res_data = [remove_tickets_available(item) for item in res.data]
+        res_data = [
+            remove_tickets_available(item) for item in res.data["results"]
+        ]
 
         self.assertIn(serializer1.data, res_data)
         self.assertIn(serializer2.data, res_data)
         self.assertNotIn(serializer3.data, res_data)
 
         res = self.client.get(TRIP_LIST_URL, {"arrival": "2024-11-26"})
-        res_data = [remove_tickets_available(item) for item in res.data]
+        res_data = [
+            remove_tickets_available(item) for item in res.data["results"]
+        ]
 
         self.assertIn(serializer1.data, res_data)
         self.assertIn(serializer2.data, res_data)
         self.assertNotIn(serializer3.data, res_data)
 
+    def test_filter_trip_by_departure_range(self):
+        trips = [
+            sample_trip(
+                departure_time=make_aware(datetime(2024, 11, 25, hour, 0)),
+                arrival_time=make_aware(datetime(2024, 11, 25, hour + 2, 0)),
+            )
+            for hour in (0, 8, 12)
+        ]
+        next_day = sample_trip(
+            departure_time=make_aware(datetime(2024, 11, 26, 0, 0)),
+            arrival_time=make_aware(datetime(2024, 11, 26, 2, 0)),
+        )
+
+        res = self.client.get(
+            TRIP_LIST_URL,
+            {
+                "departure_after": "2024-11-25T08:00",
+                "departure_before": "2024-11-26",
+            },
+        )
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [trips[1].id, trips[2].id],
+        )
+
+        res = self.client.get(TRIP_LIST_URL, {"departure": "2024-11-25"})
+
+        ids = [item["id"] for item in res.data["results"]]
+        self.assertEqual(ids, [trip.id for trip in trips])
+        self.assertNotIn(next_day.id, ids)
+
+    def test_invalid_trip_date_filter_returns_bad_request(self):
+        for params in (
+            {"departure": "25.11.2024"},
+            {"departure_after": "tomorrow"},
+        ):
+            res = self.client.get(TRIP_LIST_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_can_create_order(self):
         data = {"tickets": [{"seat": 1, "cargo": 1, "trip": sample_trip().id}]}
         response = self.client.post(
@@ -224,6 +298,153 @@ class AuthenticatedTests(TestCase):
         )
         self.assertEqual(Order.objects.all().count(), 1)
 
+    def test_order_list_shows_own_orders_only(self):
+        other = get_user_model().objects.create_user(email="other@mail.test")
+        own = Order.objects.create(user=self.user)
+        Order.objects.create(user=other)
+
+        res = self.client.get(ORDER_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [order["id"] for order in res.data["results"]], [own.id]
+        )
+
+    def test_order_list_query_count_does_not_grow_with_tickets(self):
+        for _ in range(3):
+            order = Order.objects.create(user=self.user)
+            for seat in (1, 2):
+                Ticket.objects.create(
+                    order=order, trip=sample_trip(), cargo=1, seat=seat
+                )
+
+        with self.assertNumQueries(2):
+            res = self.client.get(ORDER_LIST_URL)
+
+        self.assertEqual(len(res.data["results"]), 3)
+        ticket = res.data["results"][0]["tickets"][0]
+        self.assertEqual(
+            ticket["trip"]["route"], "Sample source to Sample destination"
+        )
+
+    def test_trip_list_is_paginated_by_cursor(self):
+        trips = [
+            sample_trip(
+                departure_time=make_aware(datetime(2024, 11, day, 8, 0)),
+                arrival_time=make_aware(datetime(2024, 11, day, 12, 0)),
+            )
+            for day in (3, 1, 2)
+        ]
+
+        res = self.client.get(TRIP_LIST_URL, {"page_size": 2})
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]],
+            [trips[1].id, trips[2].id],
+        )
+        self.assertIsNone(res.data["previous"])
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [item["id"] for item in res.data["results"]], [trips[0].id]
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_trip_seats_returns_occupancy_bitmap(self):
+        trip = sample_trip(train=sample_train(cargo_num=2, places_in_cargo=10))
+
+        res = self.client.get(seats_url(trip.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["cargos"], ["AAA=", "AAA="])
+        self.assertEqual(res.data["tickets_available"], 20)
+
+        data = {
+            "tickets": [
+                {"cargo": 1, "seat": 1, "trip": trip.id},
+                {"cargo": 2, "seat": 10, "trip": trip.id},
+            ]
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(ORDER_LIST_URL, data=data, format="json")
+
+        res = self.client.get(seats_url(trip.id))
+
+        self.assertEqual(res.data["cargos"], ["gAA=", "AEA="])
+        self.assertEqual(res.data["tickets_available"], 18)
+
+    def test_station_autocomplete(self):
+        kyiv = sample_station(name="Kyiv-Pasazhyrskyi")
+        sample_station(name="Lviv")
+
+        res = self.client.get(STATION_AUTOCOMPLETE_URL, {"q": "pas"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"id": kyiv.id, "name": kyiv.name}])
+
+    def test_station_list_is_served_from_cache(self):
+        sample_station(name="Lviv")
+        res = self.client.get(STATION_LIST_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(STATION_LIST_URL)
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(cached["ETag"], etag)
+
+        res = self.client.get(STATION_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_station(name="Kyiv")
+
+        res = self.client.get(STATION_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(len(res.data), 2)
+
+    def test_cannot_export_tickets(self):
+        res = self.client.get(
+            ORDER_EXPORT_URL, {"start": "2024-11-01", "end": "2024-12-01"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_trip_seats_not_found(self):
+        res = self.client.get(seats_url(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SharedCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="user@mail.test", password="password"
+            )
+        )
+
+    def test_cached_responses_follow_other_processes(self):
+        sample_station(name="Lviv")
+        res = self.client.get(STATION_LIST_URL)
+        self.assertEqual(len(res.data), 1)
+
+        run_in_other_process(sample_station, name="Kyiv")
+
+        res = self.client.get(STATION_LIST_URL)
+        self.assertEqual(len(res.data), 2)
+
+    def test_station_names_follow_other_processes(self):
+        sample_station(name="Lviv")
+        res = self.client.get(STATION_AUTOCOMPLETE_URL, {"q": "kyiv"})
+        self.assertEqual(res.data, [])
+
+        run_in_other_process(sample_station, name="Kyiv")
+
+        res = self.client.get(STATION_AUTOCOMPLETE_URL, {"q": "kyiv"})
+        self.assertEqual([item["name"] for item in res.data], ["Kyiv"])
+
 
 class AdminTests(TestCase):
     def setUp(self):
@@ -267,6 +488,42 @@ class AdminTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Route.objects.all().count(), 2)
 
+    def test_bulk_upsert_routes(self):
+        lviv, kyiv, odesa = (
+            sample_station(name=name) for name in ("Lviv", "Kyiv", "Odesa")
+        )
+        route = sample_route(source=lviv, destination=kyiv, distance=500)
+        data = [
+            {"source": lviv.id, "destination": kyiv.id, "distance": 540},
+            {"source": kyiv.id, "destination": odesa.id, "distance": 475},
+        ]
+
+        with self.assertNumQueries(4):
+            response = self.client.post(ROUTE_BULK_URL, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(Route.objects.count(), 4)
+        route.refresh_from_db()
+        self.assertEqual(route.distance, 540)
+        self.assertEqual(
+            Route.objects.get(source=odesa, destination=kyiv).distance, 475
+        )
+
+    def test_bulk_upsert_routes_validates_every_route(self):
+        station = sample_station()
+        data = [
+            {"source": station.id, "destination": station.id, "distance": 1},
+            {"source": station.id, "destination": 0, "distance": 1},
+        ]
+
+        response = self.client.post(ROUTE_BULK_URL, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data[0])
+        self.assertIn("destination", response.data[1])
+        self.assertFalse(Route.objects.exists())
+
     def test_can_access_trip_list(self):
         response = self.client.get(TRIP_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -286,3 +543,154 @@ class AdminTests(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Trip.objects.all().count(), 1)
+
+    def test_cannot_create_overlapping_trip_for_train(self):
+        trip = sample_trip()
+        data = {
+            "route": trip.route.id,
+            "train": trip.train.id,
+            "departure_time": "2024-11-20 12:00:00",
+            "arrival_time": "2024-11-21 12:00:00",
+        }
+
+        response = self.client.post(TRIP_LIST_URL, data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"trip {trip.id}", str(response.data))
+
+        data["departure_time"] = "2024-11-20 22:00:00"
+        response = self.client.post(TRIP_LIST_URL, data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_cannot_create_trip_longer_than_the_maximum(self):
+        data = {
+            "route": sample_route().id,
+            "train": sample_train().id,
+            "departure_time": "2024-11-19 22:00:00",
+            "arrival_time": "2024-11-23 22:00:00",
+        }
+
+        response = self.client.post(TRIP_LIST_URL, data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("at most 72 hours", str(response.data))
+
+    def test_overlap_behind_a_shorter_trip_is_found(self):
+        # Trips saved without validation may overlap: the 04:00 trip
+        # falls inside the long one, not the later-departing short one.
+        long = sample_trip(
+            departure_time=make_aware(datetime(2024, 12, 1, 0, 0)),
+            arrival_time=make_aware(datetime(2024, 12, 1, 10, 0)),
+        )
+        sample_trip(
+            route=long.route,
+            train=long.train,
+            departure_time=make_aware(datetime(2024, 12, 1, 2, 0)),
+            arrival_time=make_aware(datetime(2024, 12, 1, 3, 0)),
+        )
+        data = {
+            "route": long.route.id,
+            "train": long.train.id,
+            "departure_time": "2024-12-01 04:00:00",
+            "arrival_time": "2024-12-01 05:00:00",
+        }
+
+        response = self.client.post(TRIP_LIST_URL, data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"trip {long.id}", str(response.data))
+
+    def test_cannot_assign_overlapping_trips_to_crew(self):
+        first = sample_trip()
+        second = sample_trip(
+            departure_time=make_aware(datetime(2024, 11, 20, 8, 0)),
+            arrival_time=make_aware(datetime(2024, 11, 20, 12, 0)),
+        )
+        data = {
+            "first_name": "John",
+            "last_name": "Doe",
+            "trips": [second.id, first.id],
+        }
+
+        response = self.client.post(CREW_LIST_URL, data=data)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["trips"],
+            [f"Trips {first.id} and {second.id} overlap."],
+        )
+
+    def test_crew_conflicts_report(self):
+        trips = [
+            sample_trip(
+                departure_time=make_aware(datetime(2030, 1, 1, start)),
+                arrival_time=make_aware(datetime(2030, 1, 1, end)),
+            )
+            for start, end in ((8, 12), (10, 14), (14, 16), (20, 22))
+        ]
+        crew = Crew.objects.create(first_name="John", last_name="Doe")
+        crew.trips.set(trips)
+
+        response = self.client.get(
+            crew_conflicts_url(crew.id),
+            {"start": "2030-01-01", "end": "2030-01-01T21:00"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["conflicts"],
+            [
+                {
+                    "trip": trips[0].id,
+                    "conflicts_with": trips[1].id,
+                    "overlap_start": trips[1].departure_time,
+                    "overlap_end": trips[0].arrival_time,
+                }
+            ],
+        )
+
+    def test_export_tickets_streams_orders_in_range(self):
+        trip = sample_trip()
+        tickets = []
+        for day, seat in ((5, 1), (20, 2)):
+            order = Order.objects.create(user=self.admin_user)
+            Order.objects.filter(pk=order.pk).update(
+                created_at=make_aware(datetime(2024, 11, day, 12, 0))
+            )
+            tickets.append(
+                Ticket.objects.create(
+                    trip=trip, order=order, cargo=1, seat=seat
+                )
+            )
+
+        res = self.client.get(
+            ORDER_EXPORT_URL, {"start": "2024-11-01", "end": "2024-11-10"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        header, *rows = b"".join(res.streaming_content).decode().splitlines()
+        self.assertTrue(header.startswith("ticket_id,order_id,ordered_at"))
+        self.assertEqual(len(rows), 1)
+        self.assertTrue(rows[0].startswith(f"{tickets[0].id},"))
+        self.assertIn("admin@mail.test", rows[0])
+
+        res = self.client.get(
+            ORDER_EXPORT_URL,
+            {"start": "2024-11-01", "end": "2024-12-01", "output": "ndjson"},
+        )
+
+        records = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [record["ticket_id"] for record in records],
+            [ticket.id for ticket in tickets],
+        )
+        self.assertEqual(records[1]["source"], "Sample source")
+
+    def test_export_tickets_requires_a_range(self):
+        res = self.client.get(ORDER_EXPORT_URL, {"start": "2024-11-01"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
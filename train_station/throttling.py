@@ -0,0 +1,152 @@
+"""Sliding window counter throttles with a shared, pluggable store.
+
+DRF's throttles keep a list of request timestamps per client and rewrite
+it on every request. These keep two counters per client instead, for the
+current and the previous window, and estimate the rate over the last
+``duration`` seconds as::
+
+    previous * (1 - elapsed fraction of the current window) + current
+
+Counters are incremented atomically by the store configured with
+``THROTTLE_STORE``: the shared cache when it is Redis, or else the
+database.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+from train_station.models import ThrottleCounter
+
+
+class CacheThrottleStore:
+    """Counters in a Django cache, updated with atomic ``incr``."""
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE]
+
+    def hit(self, key, window, duration):
+        """Count a request and return ``(previous, current)`` counts."""
+        current_key = f"{key}:{window}"
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            if self.cache.add(current_key, 1, duration * 2):
+                current = 1
+            else:
+                current = self.cache.incr(current_key)
+        return self.cache.get(f"{key}:{window - 1}", 0), current
+
+    def release(self, key, window):
+        try:
+            self.cache.decr(f"{key}:{window}")
+        except ValueError:
+            pass
+
+    def clear(self, key, windows):
+        self.cache.delete_many([f"{key}:{window}" for window in windows])
+
+
+class DatabaseThrottleStore:
+    """Counters in the database, for setups without Redis.
+
+    Increments are single UPDATE statements, so they are atomic across
+    processes, and counts are read back from the primary. Starting a
+    window deletes the client's older ones and every counter that has
+    outlived its throttle.
+    """
+
+    def counters(self):
+        return ThrottleCounter.objects.using(DEFAULT_DB_ALIAS)
+
+    def hit(self, key, window, duration):
+        counters = self.counters().filter(key=key)
+        if not counters.filter(window=window).update(count=F("count") + 1):
+            now = timezone.now()
+            try:
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    self.counters().create(
+                        key=key,
+                        window=window,
+                        count=1,
+                        expires_at=now + timedelta(seconds=duration * 2),
+                    )
+            except IntegrityError:
+                counters.filter(window=window).update(count=F("count") + 1)
+            counters.filter(window__lt=window - 1).delete()
+            self.counters().filter(expires_at__lt=now).delete()
+
+        counts = dict(
+            counters.filter(window__gte=window - 1).values_list(
+                "window", "count"
+            )
+        )
+        return counts.get(window - 1, 0), counts.get(window, 0)
+
+    def release(self, key, window):
+        self.counters().filter(key=key, window=window).update(
+            count=F("count") - 1
+        )
+
+    def clear(self, key, windows):
+        self.counters().filter(key=key, window__in=windows).delete()
+
+
+def get_throttle_store():
+    return import_string(settings.THROTTLE_STORE)()
+
+
+class SlidingWindowThrottleMixin:
+    """Replace a rate throttle's request history with window counters."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        store = get_throttle_store()
+        window, elapsed = divmod(self.timer(), self.duration)
+        window = int(window)
+        previous, current = store.hit(self.key, window, self.duration)
+        weight = 1 - elapsed / self.duration
+        if previous * weight + current <= self.num_requests:
+            return True
+
+        store.release(self.key, window)
+        current -= 1
+        if current < self.num_requests and previous:
+            # Wait until the previous window's share has decayed enough.
+            needed = 1 - (self.num_requests - current) / previous
+            self.wait_time = needed * self.duration - elapsed
+        else:
+            self.wait_time = self.duration - elapsed
+        return False
+
+    def wait(self):
+        return max(self.wait_time, 0)
+
+    def reset(self, key):
+        """Forget a client's requests, ex. between benchmark runs."""
+        window = int(self.timer() // self.duration)
+        get_throttle_store().clear(key, (window - 1, window))
+
+
+class AnonRateThrottle(
+    SlidingWindowThrottleMixin, throttling.AnonRateThrottle
+):
+    pass
+
+
+class UserRateThrottle(
+    SlidingWindowThrottleMixin, throttling.UserRateThrottle
+):
+    pass
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from train_station import async_views
 from train_station.views import (
     StationViewSet,
     TrainViewSet,
@@ -8,6 +9,9 @@ from train_station.views import (
     RouteViewSet,
     CrewViewSet,
     OrderViewSet,
+    SeatHoldViewSet,
+    JourneyViewSet,
+    DailyLoadViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -17,7 +21,27 @@ router.register("trips", TripViewSet)
 router.register("routes", RouteViewSet)
 router.register("crews", CrewViewSet)
 router.register("orders", OrderViewSet)
+router.register("holds", SeatHoldViewSet)
+router.register("journeys", JourneyViewSet, basename="journey")
+router.register("daily-loads", DailyLoadViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path(
+        "async/trips/",
+        async_views.trip_list,
+        name="trip-list-async",
+    ),
+    path(
+        "async/trips/<int:pk>/",
+        async_views.trip_detail,
+        name="trip-detail-async",
+    ),
+    path(
+        "async/trips/<int:pk>/seats/",
+        async_views.trip_seats,
+        name="trip-seats-async",
+    ),
+]
 
 app_name = "train-station"
@@ -1,19 +1,58 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from django.db.models import F, Count
+from django.conf import settings
+from django.db.models import F, Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets, mixins
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
+from train_station.caching import CachedListMixin, CachedRetrieveMixin
+from train_station.distances import (
+    DistanceMatrixUnavailable,
+    shortest_path,
+)
+from train_station.exports import (
+    EXPORT_CONTENT_TYPES,
+    EXPORT_FORMATS,
+    export_tickets,
+)
+from train_station.filters import (
+    filter_trips,
+    parse_date_param,
+    parse_datetime_param,
+)
+from train_station.geo import nearby_stations
+from train_station.journeys import plan_journeys
+from train_station.pagination import (
+    TripPagination,
+    OrderPagination,
+    RoutePagination,
+    CrewPagination,
+    DailyLoadPagination,
+)
 from train_station.permissions import IsAdminOrIfAuthenticatedReadOnly
+from train_station.projections import FastJSONRenderer
+from train_station.scheduling import crew_trips, find_overlaps
+from train_station.search import autocomplete_stations
+from train_station.seats import get_seat_map, invalidate_seat_maps
 from train_station.models import (
     Train,
+    TrainType,
     Station,
     Route,
     Trip,
     Crew,
     Order,
+    SeatHold,
+    Ticket,
+    DailyLoad,
 )
 from train_station.serializers import (
     TrainSerializer,
@@ -21,6 +60,7 @@ from train_station.serializers import (
     RouteSerializer,
     RouteListSerializer,
     RouteDetailSerializer,
+    RouteUpsertSerializer,
     TripSerializer,
     TripListSerializer,
     CrewSerializer,
@@ -28,10 +68,19 @@ from train_station.serializers import (
     OrderListSerializer,
     TripDetailSerializer,
     CrewListSerializer,
+    SeatHoldSerializer,
+    JourneyQuerySerializer,
+    DailyLoadSerializer,
+    NearbyQuerySerializer,
+    DistanceQuerySerializer,
+    TRIP_LIST_PROJECTION,
 )
+from train_station_service.metrics import SerializeTimingMixin
+from train_station_service.replicas import pin_to_primary
 
 
 class CrewViewSet(
+    SerializeTimingMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
@@ -42,35 +91,166 @@ class CrewViewSet(
         "trips__train__train_type",
     )
     serializer_class = CrewSerializer
+    pagination_class = CrewPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_queryset(self):
+        if self.action == "conflicts":
+            return Crew.objects.all()
+        return self.queryset
+
     def get_serializer_class(self):
         if self.action == "list":
             return CrewListSerializer
         return CrewSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "start",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "Start of the planning horizon, now by default "
+                    "(ex. ?start=2024-11-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "end",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "End of the planning horizon, CREW_PLANNING_HORIZON "
+                    "after start by default (ex. ?end=2024-12-01)"
+                ),
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(detail=True, methods=["get"], pagination_class=None)
+    def conflicts(self, request, pk=None):
+        """List the overlapping trips of a crew member in a horizon."""
+        crew = self.get_object()
+        params = request.query_params
+        start = (
+            parse_datetime_param("start", params["start"])
+            if params.get("start")
+            else timezone.now()
+        )
+        end = (
+            parse_datetime_param("end", params["end"])
+            if params.get("end")
+            else start + settings.CREW_PLANNING_HORIZON
+        )
+        return Response(
+            {
+                "crew": crew.pk,
+                "start": start,
+                "end": end,
+                "conflicts": [
+                    {
+                        "trip": earlier["id"],
+                        "conflicts_with": later["id"],
+                        "overlap_start": later["departure_time"],
+                        "overlap_end": min(
+                            earlier["arrival_time"], later["arrival_time"]
+                        ),
+                    }
+                    for earlier, later in find_overlaps(
+                        crew_trips(crew, start, end)
+                    )
+                ],
+            }
+        )
+
 
 class TrainViewSet(
+    SerializeTimingMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = Train.objects.select_related("train_type")
     serializer_class = TrainSerializer
+    cache_models = (Train, TrainType)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
 
 class StationViewSet(
+    SerializeTimingMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = Station.objects.all()
     serializer_class = StationSerializer
+    cache_models = (Station,)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                required=True,
+                description=(
+                    "Start of a word in the Station name (ex. ?q=kyi)"
+                ),
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response([])
+        return Response(autocomplete_stations(query))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "lat",
+                type=OpenApiTypes.FLOAT,
+                required=True,
+                description="Latitude in degrees (ex. ?lat=49.84)",
+            ),
+            OpenApiParameter(
+                "lon",
+                type=OpenApiTypes.FLOAT,
+                required=True,
+                description="Longitude in degrees (ex. ?lon=24.03)",
+            ),
+            OpenApiParameter(
+                "radius",
+                type=OpenApiTypes.FLOAT,
+                description="Search radius in kilometres (default 50)",
+            ),
+            OpenApiParameter(
+                "k",
+                type=OpenApiTypes.INT,
+                description="Maximum number of stations (default 10)",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """Stations within a radius of a point, nearest first."""
+        query = NearbyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        return Response(
+            nearby_stations(
+                params["lat"], params["lon"], params["radius"], params["k"]
+            )
+        )
+
 
 class RouteViewSet(
+    SerializeTimingMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -78,6 +258,8 @@ class RouteViewSet(
 ):
     queryset = Route.objects.select_related("source", "destination")
     serializer_class = RouteSerializer
+    pagination_class = RoutePagination
+    cache_models = (Route, Station)
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
     def get_serializer_class(self):
@@ -86,10 +268,77 @@ class RouteViewSet(
 
         if self.action == "retrieve":
             return RouteDetailSerializer
+
+        if self.action == "bulk":
+            return RouteUpsertSerializer
         return RouteSerializer
 
+    @extend_schema(
+        request=RouteUpsertSerializer(many=True),
+        responses=RouteUpsertSerializer(many=True),
+    )
+    @action(detail=False, methods=["post"], pagination_class=None)
+    def bulk(self, request):
+        """Create or update many routes, each in both directions."""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the departure Station",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the arrival Station",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get"])
+    def distance(self, request):
+        """Shortest network distance between two stations and its path.
+
+        ``distance`` is null when no chain of routes connects them.
+        Answers come from the last published matrix and are 503 until
+        the first one is built. ``stale`` is true while routes changed
+        since then are being recomputed, and answers whose path went
+        through a deleted station are 503 until that is done.
+        """
+        query = DistanceQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
 
-class TripViewSet(viewsets.ModelViewSet):
+        distance, path, stale = shortest_path(
+            params["source"], params["destination"]
+        )
+        stations = Station.objects.only("name").in_bulk(path)
+        if len(stations) < len(path):
+            raise DistanceMatrixUnavailable(
+                "Route distances are being recomputed."
+            )
+        return Response(
+            {
+                "source": params["source"],
+                "destination": params["destination"],
+                "distance": distance,
+                "stale": stale,
+                "path": [
+                    {"id": station_id, "name": stations[station_id].name}
+                    for station_id in path
+                ],
+            }
+        )
+
+
+class TripViewSet(SerializeTimingMixin, viewsets.ModelViewSet):
     queryset = Trip.objects.select_related(
         "route__source",
         "route__destination",
@@ -97,41 +346,28 @@ class TripViewSet(viewsets.ModelViewSet):
     ).annotate(
         tickets_available=(
             F("train__cargo_num") * F("train__places_in_cargo")
-            - Count("tickets")
+            - F("tickets_sold")
         )
     )
     serializer_class = TripSerializer
+    pagination_class = TripPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
     def get_queryset(self):
-        train = self.request.query_params.get("train")
-        source = self.request.query_params.get("source")
-        destination = self.request.query_params.get("destination")
-        departure_date = self.request.query_params.get("departure")
-        arrival_date = self.request.query_params.get("arrival")
+        return filter_trips(self.queryset, self.request.query_params)
 
-        queryset = self.queryset
-
-        if train:
-            queryset = queryset.filter(train__name__icontains=train)
-
-        if source:
-            queryset = queryset.filter(route__source__name__icontains=source)
-
-        if destination:
-            queryset = queryset.filter(
-                route__destination__name__icontains=destination
-            )
-
-        if departure_date:
-            date = datetime.strptime(departure_date, "%Y-%m-%d").date()
-            queryset = queryset.filter(departure_time__date=date)
-
-        if arrival_date:
-            date = datetime.strptime(arrival_date, "%Y-%m-%d").date()
-            queryset = queryset.filter(arrival_time__date=date)
-
-        return queryset.distinct()
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == "list":
+            renderers = [
+                (
+                    FastJSONRenderer()
+                    if type(renderer) is JSONRenderer
+                    else renderer
+                )
+                for renderer in renderers
+            ]
+        return renderers
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -172,25 +408,70 @@ class TripViewSet(viewsets.ModelViewSet):
                     "Filter by arrival date of Trip (ex. ?date=2024-11-26)"
                 ),
             ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "Trips departing at or after the given moment or date "
+                    "(ex. ?departure_after=2024-11-25T08:00)"
+                ),
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description=(
+                    "Trips departing strictly before the given moment or "
+                    "date (ex. ?departure_before=2024-11-26)"
+                ),
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(TRIP_LIST_PROJECTION.values(queryset))
+        return self.get_paginated_response(
+            TRIP_LIST_PROJECTION.serialize(page)
+        )
+
+    @extend_schema(
+        responses=OpenApiTypes.OBJECT,
+        description=(
+            "Seat occupancy of a Trip. Every item of `cargos` is a base64 "
+            "bitmap of one cargo: bit `seat - 1`, most significant bit "
+            "first, is set when the seat is sold or held."
+        ),
+    )
+    @action(detail=True, methods=["get"], url_path="seats")
+    def seats(self, request, pk=None):
+        seat_map = get_seat_map(pk) if str(pk).isdigit() else None
+        if seat_map is None:
+            raise Http404
+        return Response(seat_map)
 
 
 class OrderViewSet(
+    SerializeTimingMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = Order.objects.prefetch_related(
-        "tickets__trip__train__train_type",
-        "tickets__trip__route__source",
-        "tickets__trip__route__destination",
+        Prefetch(
+            "tickets",
+            queryset=Ticket.objects.select_related(
+                "trip__train__train_type",
+                "trip__route__source",
+                "trip__route__destination",
+            ),
+        )
     )
     serializer_class = OrderSerializer
+    pagination_class = OrderPagination
     permission_classes = (IsAuthenticated,)
 
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
     def get_serializer_class(self):
         if self.action == "list":
             return OrderListSerializer
@@ -198,3 +479,235 @@ class OrderViewSet(
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        pin_to_primary(self.request)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "start",
+                type=OpenApiTypes.DATETIME,
+                required=True,
+                description=(
+                    "Export tickets of orders created at or after this "
+                    "moment or date (ex. ?start=2024-11-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "end",
+                type=OpenApiTypes.DATETIME,
+                required=True,
+                description=(
+                    "Export tickets of orders created strictly before this "
+                    "moment or date (ex. ?end=2024-12-01)"
+                ),
+            ),
+            OpenApiParameter(
+                "output",
+                type=OpenApiTypes.STR,
+                enum=EXPORT_FORMATS,
+                description="Export format, csv (default) or ndjson",
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(IsAdminUser,),
+        pagination_class=None,
+    )
+    def export(self, request):
+        """Stream every ticket sold in a period as CSV or NDJSON."""
+        params = request.query_params
+        output = params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": f"Expected one of: {', '.join(EXPORT_FORMATS)}."}
+            )
+        bounds = {}
+        for name in ("start", "end"):
+            if not params.get(name):
+                raise ValidationError({name: "This parameter is required."})
+            bounds[name] = parse_datetime_param(name, params[name])
+
+        response = StreamingHttpResponse(
+            export_tickets(bounds["start"], bounds["end"], output),
+            content_type=EXPORT_CONTENT_TYPES[output],
+        )
+        filename = (
+            f"tickets-{bounds['start']:%Y%m%d}-{bounds['end']:%Y%m%d}.{output}"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class SeatHoldViewSet(
+    SerializeTimingMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.prefetch_related("seats")
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        trip_ids = {seat.trip_id for seat in instance.seats.all()}
+        instance.delete()
+        invalidate_seat_maps(trip_ids)
+
+
+class JourneyViewSet(viewsets.ViewSet):
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    @staticmethod
+    def format_time(timestamp):
+        return datetime.fromtimestamp(
+            timestamp, tz=timezone.get_current_timezone()
+        ).strftime("%Y-%m-%d %H:%M")
+
+    def serialize_journey(self, legs, stations):
+        return {
+            "departure_time": self.format_time(legs[0][3]),
+            "arrival_time": self.format_time(legs[-1][4]),
+            "transfers": len(legs) - 1,
+            "legs": [
+                {
+                    "trip": trip_id,
+                    "source": stations[source].name,
+                    "destination": stations[destination].name,
+                    "departure_time": self.format_time(departure),
+                    "arrival_time": self.format_time(arrival),
+                }
+                for trip_id, source, destination, departure, arrival in legs
+            ],
+        }
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the departure Station",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Id of the arrival Station",
+            ),
+            OpenApiParameter(
+                "departure",
+                type=OpenApiTypes.DATETIME,
+                description="Earliest departure, defaults to now",
+            ),
+            OpenApiParameter(
+                "min_transfer",
+                type=OpenApiTypes.INT,
+                description="Minimum transfer time in minutes",
+            ),
+            OpenApiParameter(
+                "max_transfers",
+                type=OpenApiTypes.INT,
+                description="Maximum number of transfers (default 3)",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def list(self, request):
+        query = JourneyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        min_transfer = params.get("min_transfer")
+        journeys = plan_journeys(
+            params["source"],
+            params["destination"],
+            params.get("departure") or timezone.now(),
+            min_transfer=(
+                None
+                if min_transfer is None
+                else timedelta(minutes=min_transfer)
+            ),
+            max_transfers=params["max_transfers"],
+        )
+
+        stations = Station.objects.only("name").in_bulk(
+            {leg[1] for legs in journeys.values() for leg in legs}
+            | {leg[2] for legs in journeys.values() for leg in legs}
+        )
+        return Response(
+            {
+                kind: self.serialize_journey(legs, stations)
+                for kind, legs in journeys.items()
+            }
+        )
+
+
+class DailyLoadViewSet(
+    SerializeTimingMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
+    """Seats offered and sold per route, train type and day."""
+
+    queryset = DailyLoad.objects.select_related(
+        "route__source", "route__destination", "train_type"
+    )
+    serializer_class = DailyLoadSerializer
+    pagination_class = DailyLoadPagination
+    permission_classes = (IsAdminUser,)
+
+    def get_queryset(self):
+        queryset = self.queryset
+        params = self.request.query_params
+
+        if params.get("start"):
+            queryset = queryset.filter(
+                date__gte=parse_date_param("start", params["start"])
+            )
+        if params.get("end"):
+            queryset = queryset.filter(
+                date__lt=parse_date_param("end", params["end"])
+            )
+        for name in ("route", "train_type"):
+            if params.get(name):
+                if not params[name].isdigit():
+                    raise ValidationError({name: "Expected an id."})
+                queryset = queryset.filter(**{name: params[name]})
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "start",
+                type=OpenApiTypes.DATE,
+                description="First day, inclusive (ex. ?start=2024-11-01)",
+            ),
+            OpenApiParameter(
+                "end",
+                type=OpenApiTypes.DATE,
+                description="Last day, exclusive (ex. ?end=2024-12-01)",
+            ),
+            OpenApiParameter(
+                "route",
+                type=OpenApiTypes.INT,
+                description="Filter by route id (ex. ?route=2)",
+            ),
+            OpenApiParameter(
+                "train_type",
+                type=OpenApiTypes.INT,
+                description="Filter by train type id (ex. ?train_type=1)",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
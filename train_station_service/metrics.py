@@ -0,0 +1,349 @@
+"""Lightweight per-request timing and SQL instrumentation.
+
+``MetricsMiddleware`` measures every request and sends the breakdown
+in a ``Server-Timing`` header. It also folds the numbers into in-process
+histograms that ``metrics_view`` exposes in the Prometheus text format.
+The histograms are per process, so each worker is scraped on its own.
+Views opt into serializer timing with ``SerializeTimingMixin``.
+The view also reports the state of every database connection pool;
+checkouts per second are ``rate()`` of the checkout counter.
+"""
+
+import threading
+import time
+from ipaddress import ip_address
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# (name, type, help, value) of the psycopg pool statistics.
+POOL_METRICS = (
+    (
+        "train_station_db_pool_connections_in_use",
+        "gauge",
+        "Connections checked out of the pool.",
+        lambda stats: stats["pool_size"] - stats["pool_available"],
+    ),
+    (
+        "train_station_db_pool_connections_idle",
+        "gauge",
+        "Connections waiting in the pool.",
+        lambda stats: stats["pool_available"],
+    ),
+    (
+        "train_station_db_pool_connections_max",
+        "gauge",
+        "Maximum size of the pool.",
+        lambda stats: stats["pool_max"],
+    ),
+    (
+        "train_station_db_pool_requests_waiting",
+        "gauge",
+        "Checkouts queued for a free connection.",
+        lambda stats: stats["requests_waiting"],
+    ),
+    (
+        "train_station_db_pool_checkouts_total",
+        "counter",
+        "Connections handed out by the pool.",
+        lambda stats: stats.get("requests_num", 0),
+    ),
+    (
+        "train_station_db_pool_wait_seconds_total",
+        "counter",
+        "Time checkouts spent queued for a connection.",
+        lambda stats: stats.get("requests_wait_ms", 0) / 1000,
+    ),
+    (
+        "train_station_db_pool_checkout_errors_total",
+        "counter",
+        "Checkouts that timed out or found the queue full.",
+        lambda stats: stats.get("requests_errors", 0),
+    ),
+    (
+        "train_station_db_pool_connections_opened_total",
+        "counter",
+        "Connections opened by the pool.",
+        lambda stats: stats.get("connections_num", 0),
+    ),
+    (
+        "train_station_db_pool_connections_lost_total",
+        "counter",
+        "Connections dropped by the health check on checkout.",
+        lambda stats: stats.get("connections_lost", 0),
+    ),
+)
+
+current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db", "serialize", "render", "render_started")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series.setdefault(
+                labels, [[0] * (len(self.buckets) + 1), 0.0]
+            )
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def expose(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self.series.items()):
+            view, method = labels
+            label = f'view="{view}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket{{{label},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            yield f"{self.name}_sum{{{label}}} {total}"
+            yield f"{self.name}_count{{{label}}} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {
+            "total": Histogram(
+                "train_station_request_duration_seconds",
+                "Time spent handling the request.",
+                DURATION_BUCKETS,
+            ),
+            "db": Histogram(
+                "train_station_request_db_duration_seconds",
+                "Time spent executing SQL during the request.",
+                DURATION_BUCKETS,
+            ),
+            "serialize": Histogram(
+                "train_station_request_serializer_duration_seconds",
+                "Time views spent building responses, SQL excluded.",
+                DURATION_BUCKETS,
+            ),
+            "queries": Histogram(
+                "train_station_request_queries",
+                "SQL queries executed during the request.",
+                QUERY_BUCKETS,
+            ),
+        }
+
+    def observe(self, labels, values):
+        with self.lock:
+            for name, value in values.items():
+                self.histograms[name].observe(labels, value)
+
+    def expose(self):
+        with self.lock:
+            lines = [
+                line
+                for histogram in self.histograms.values()
+                for line in histogram.expose()
+            ]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def connection_pools():
+    """Connection pools of the configured databases, by alias."""
+    return {
+        connection.alias: connection.pool
+        for connection in connections.all()
+        if getattr(connection, "pool", None) is not None
+    }
+
+
+def expose_pools(pools):
+    stats = {alias: pool.get_stats() for alias, pool in sorted(pools.items())}
+    lines = []
+    for name, kind, help_text, value in POOL_METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [
+            f'{name}{{alias="{alias}"}} {value(alias_stats)}'
+            for alias, alias_stats in stats.items()
+        ]
+    return "\n".join(lines) + "\n" if stats else ""
+
+
+def serialize_started():
+    """Mark the start of serialization work, for ``serialize_finished``."""
+    metrics = current.get()
+    if metrics is None:
+        return None
+    return metrics, time.perf_counter(), metrics.db
+
+
+def serialize_finished(mark):
+    """Count the time since ``mark``, minus its SQL, as serialization."""
+    if mark is not None:
+        metrics, started, db = mark
+        elapsed = time.perf_counter() - started
+        metrics.serialize += elapsed - (metrics.db - db)
+
+
+class SerializeTimingMixin:
+    """Time the view's handler, minus its SQL, as serialization.
+
+    The clock starts once the request is authenticated, checked and
+    throttled. Querysets are lazy, so the rest of the handler's time
+    outside the database goes mostly to building the response data.
+    """
+
+    serialize_mark = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.serialize_mark = serialize_started()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        serialize_finished(self.serialize_mark)
+        self.serialize_mark = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def view_labels(request):
+    match = request.resolver_match
+    if match is None:
+        return "unresolved", request.method
+    func = match.func
+    cls = getattr(func, "cls", None)
+    if cls is None:
+        return match.view_name or func.__name__, request.method
+    action = getattr(func, "actions", {}).get(request.method.lower())
+    name = f"{cls.__name__}.{action}" if action else cls.__name__
+    return name, request.method
+
+
+def wrap_connections(stack, metrics):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                wrap_connections(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                wrap_connections(stack, metrics)
+                response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={metrics.db * 1000:.2f};desc="{metrics.queries} '
+                'queries"',
+                f"serialize;dur={metrics.serialize * 1000:.2f}",
+                f"render;dur={metrics.render * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            )
+        )
+        registry.observe(
+            view_labels(request),
+            {
+                "total": total,
+                "db": metrics.db,
+                "serialize": metrics.serialize,
+                "queries": metrics.queries,
+            },
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = current.get()
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: self.rendered(metrics)
+            )
+        return response
+
+    @staticmethod
+    def rendered(metrics):
+        metrics.render = time.perf_counter() - metrics.render_started
+
+
+def is_allowed_scraper(address):
+    try:
+        address = ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        address in network for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    if not is_allowed_scraper(request.META.get("REMOTE_ADDR", "")) and not (
+        request.user.is_authenticated and request.user.is_staff
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.expose() + expose_pools(connection_pools()),
+        content_type="text/plain; version=0.0.4",
+    )
@@ -0,0 +1,120 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+``ReplicaMiddleware`` picks one of ``REPLICA_DATABASES`` for the reads of
+every safe-method request and ``ReplicaRouter`` sends them there; writes,
+unsafe methods and anything outside a request use the primary. A client
+that has just written something the replicas may not have caught up
+with is pinned to the primary for ``REPLICA_PIN_WINDOW`` with
+``pin_to_primary``; pins are kept in ``REPLICA_PIN_CACHE``, which every
+worker shares. Clients are told apart by the user of their access
+token, which is read without touching the database.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+PIN_KEY = "train-station:replica-pin:{}"
+
+read_alias = ContextVar("replica_read_alias", default=None)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary, ex. to fill caches that outlive the request."""
+    token = read_alias.set(None)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+def request_user_id(request):
+    """User id of the request's access token, or ``None``."""
+    user = getattr(request, "user", None)
+    if user is not None and getattr(user, "is_authenticated", False):
+        return user.pk
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except TokenError:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+def pin_to_primary(request):
+    """Send the reads of the request's client to the primary for a while."""
+    user_id = request_user_id(request)
+    if user_id is not None:
+        caches[settings.REPLICA_PIN_CACHE].set(
+            PIN_KEY.format(user_id),
+            True,
+            settings.REPLICA_PIN_WINDOW.total_seconds(),
+        )
+
+
+def is_pinned(user_id):
+    return user_id is not None and caches[settings.REPLICA_PIN_CACHE].get(
+        PIN_KEY.format(user_id), False
+    )
+
+
+def choose_read_alias(request):
+    if request.method not in SAFE_METHODS or not settings.REPLICA_DATABASES:
+        return None
+    if is_pinned(request_user_id(request)):
+        return None
+    return random.choice(settings.REPLICA_DATABASES)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = read_alias.set(choose_read_alias(request))
+        try:
+            return self.get_response(request)
+        finally:
+            read_alias.reset(token)
+
+    async def __acall__(self, request):
+        token = read_alias.set(choose_read_alias(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            read_alias.reset(token)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from datetime import timedelta
+from ipaddress import ip_network
 from os import getenv
 from pathlib import Path
 
@@ -53,14 +54,14 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "drf_spectacular",
-    "debug_toolbar",
     "train_station",
     "user",
 ]
 
 MIDDLEWARE = [
+    "train_station_service.metrics.MetricsMiddleware",
+    "train_station_service.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -69,6 +70,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
 ROOT_URLCONF = "train_station_service.urls"
 
 TEMPLATES = [
@@ -100,14 +108,89 @@ DATABASES = {
         "PASSWORD": getenv("POSTGRES_PASSWORD"),
         "HOST": getenv("POSTGRES_HOST"),
         "PORT": getenv("POSTGRES_PORT"),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Each worker process keeps a pool of connections, so requests skip the
+# connect and authentication handshake. Connections are checked before
+# they are handed out, recycled after DB_POOL_MAX_LIFETIME and closed
+# after DB_POOL_MAX_IDLE seconds unused; at most DB_POOL_MAX_WAITING
+# requests queue for DB_POOL_TIMEOUT seconds when all are in use. With
+# DB_POOL=False connections persist per thread instead.
+if getenv("DB_POOL", "True") == "True":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(getenv("DB_POOL_TIMEOUT", 10)),
+            "max_waiting": int(getenv("DB_POOL_MAX_WAITING", 50)),
+            "max_lifetime": float(getenv("DB_POOL_MAX_LIFETIME", 3600)),
+            "max_idle": float(getenv("DB_POOL_MAX_IDLE", 600)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(getenv("DB_CONN_MAX_AGE", 600))
+
+# Read replicas share the primary's credentials, ex.
+# POSTGRES_REPLICA_HOSTS=replica-1,replica-2:5433
+for index, address in enumerate(
+    filter(None, getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1
+):
+    host, _, port = address.partition(":")
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+
 if DEBUG:
+    # A second SQLite file stands in for a replica; copy db.sqlite3 over
+    # it to "replicate" and set REPLICA_READS=True to read from it.
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {"transaction_mode": "IMMEDIATE", "timeout": 20},
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+        },
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db_replica.sqlite3",
+            "TEST": {"NAME": BASE_DIR / "test_db_replica.sqlite3"},
+        },
+    }
+
+DATABASE_ROUTERS = ["train_station_service.replicas.ReplicaRouter"]
+
+REPLICA_DATABASES = (
+    [alias for alias in DATABASES if alias != "default"]
+    if getenv("REPLICA_READS", str(not DEBUG)) == "True"
+    else []
+)
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+
+# Cache versions, cached responses, users, throttle counters and replica
+# pins must be seen by every worker, so the default cache is shared:
+# Redis at REDIS_URL, or else files under CACHE_DIR, which only the
+# processes of one host share. Deployments that run on more than one
+# host set REDIS_URL.
+if getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": getenv("CACHE_DIR", BASE_DIR / "var" / "cache"),
+            "OPTIONS": {"MAX_ENTRIES": 10000},
         }
     }
 
@@ -160,12 +243,12 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "train_station.throttling.AnonRateThrottle",
+        "train_station.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "30/day"},
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -187,3 +270,61 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
 }
+
+# Networks of the scrapers that may read /metrics/ without a staff login,
+# ex. "10.0.0.0/8,fd00::/8". Behind a proxy every client has the proxy's
+# address, so none are trusted unless configured.
+METRICS_ALLOWED_NETWORKS = [
+    ip_network(network.strip())
+    for network in getenv("METRICS_ALLOWED_NETWORKS", "").split(",")
+    if network.strip()
+]
+
+THROTTLE_CACHE = "default"
+
+# Pins must be seen by every worker, so they go to the shared cache.
+REPLICA_PIN_CACHE = "default"
+
+REPLICA_PIN_WINDOW = timedelta(
+    seconds=int(getenv("REPLICA_PIN_WINDOW_SECONDS", 10))
+)
+
+# Throttle counters need atomic increments, which the file cache lacks.
+THROTTLE_STORE = getenv(
+    "THROTTLE_STORE",
+    (
+        "train_station.throttling.CacheThrottleStore"
+        if getenv("REDIS_URL")
+        else "train_station.throttling.DatabaseThrottleStore"
+    ),
+)
+
+SEAT_MAP_CACHE_TIMEOUT = int(getenv("SEAT_MAP_CACHE_TIMEOUT", 300))
+
+RESPONSE_CACHE_TIMEOUT = int(getenv("RESPONSE_CACHE_TIMEOUT", 3600))
+
+SEAT_HOLD_TTL = timedelta(minutes=int(getenv("SEAT_HOLD_TTL_MINUTES", 10)))
+
+JOURNEY_MIN_TRANSFER = timedelta(
+    minutes=int(getenv("JOURNEY_MIN_TRANSFER_MINUTES", 10))
+)
+JOURNEY_SEARCH_HORIZON = timedelta(
+    hours=int(getenv("JOURNEY_SEARCH_HORIZON_HOURS", 48))
+)
+
+CREW_PLANNING_HORIZON = timedelta(
+    days=int(getenv("CREW_PLANNING_HORIZON_DAYS", 30))
+)
+
+# Longest trip the schedule accepts. Train conflict checks only look at
+# trips departing this long before a new one.
+MAX_TRIP_DURATION = timedelta(hours=int(getenv("MAX_TRIP_DURATION_HOURS", 72)))
+
+TEST_RUNNER = "train_station_service.test_runner.TestRunner"
+
+DISTANCE_MATRIX_DIR = getenv(
+    "DISTANCE_MATRIX_DIR", BASE_DIR / "var" / "distance_matrix"
+)
+
+# Route changes rebuild the distance matrix in a background thread.
+DISTANCE_MATRIX_REBUILD_ON_CHANGE = True
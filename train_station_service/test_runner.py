@@ -0,0 +1,41 @@
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Run the tests against a cache of their own.
+
+    The default cache is shared with other processes, so entries left by
+    the development server or an earlier run would leak into the tests.
+    Tests get a fresh file cache instead, which processes they start
+    still share. Throttle counters go to that cache too, so that query
+    counts cover the views alone; the database store has tests of its
+    own. Route changes leave the distance matrix to the tests that
+    rebuild it, rather than to threads outside their transaction.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix="train-station-cache-")
+        self.cache_settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": (
+                        "django.core.cache.backends.filebased.FileBasedCache"
+                    ),
+                    "LOCATION": self.cache_dir,
+                    "OPTIONS": {"MAX_ENTRIES": 10000},
+                }
+            },
+            THROTTLE_STORE="train_station.throttling.CacheThrottleStore",
+            DISTANCE_MATRIX_REBUILD_ON_CHANGE=False,
+        )
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -21,6 +21,7 @@ from django.urls.conf import include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from train_station_service import settings
+from train_station_service.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -35,6 +36,7 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name="schema"),
         name="swagger-ui",
     ),
+    path("metrics/", metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
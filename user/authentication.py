@@ -0,0 +1,103 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from train_station_service.replicas import use_primary
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def user_version_key(user_id):
+    return f"auth:user-version:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """Drop a cached user and publish a new version of it, now and again
+    after commit.
+
+    The second time covers requests that cache the old row while the
+    change is not yet committed. The entry is dropped as well as
+    outdated because the version key may be evicted, and an entry cached
+    before any version was published would match the missing key again.
+    """
+    key = user_cache_key(user_id)
+    version_key = user_version_key(user_id)
+    timeout = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+
+    def invalidate():
+        cache.delete(key)
+        cache.set(version_key, time.time_ns(), timeout)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that caches the token's user until it expires.
+
+    Access tokens are short-lived but used for many requests, so the user
+    row is read once per token instead of once per request. Saving,
+    deleting or updating users publishes a new version of them in the
+    shared cache, and a cached user is only used with the version it was
+    read at.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        key = user_cache_key(user_id)
+        version_key = user_version_key(user_id)
+        cached = cache.get_many([key, version_key])
+        version = cached.get(version_key)
+        if key in cached and cached[key][0] == version:
+            user = cached[key][1]
+        else:
+            try:
+                with use_primary():
+                    user = self.user_model.objects.get(
+                        **{api_settings.USER_ID_FIELD: user_id}
+                    )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(
+                    _("User not found"), code="user_not_found"
+                )
+            timeout = int(validated_token["exp"] - time.time())
+            if timeout > 0:
+                cache.set(key, (version, user), timeout)
+
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."),
+                    code="password_changed",
+                )
+
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = CachedJWTAuthentication
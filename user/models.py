@@ -5,8 +5,28 @@ from django.contrib.auth.models import (
 from django.db import models
 from django.utils.translation import gettext as _
 
+from user.authentication import invalidate_cached_user
 
-class UserManager(BaseUserManager):
+
+class UserQuerySet(models.QuerySet):
+    """Drop cached users on bulk writes, which skip the model signals."""
+
+    def update(self, **kwargs):
+        user_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        for user_id in user_ids:
+            invalidate_cached_user(user_id)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        for obj in objs:
+            invalidate_cached_user(obj.pk)
+        return rows
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Define a model manager for User model with no username field."""
 
     use_in_migrations = True
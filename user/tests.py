@@ -1,3 +1,92 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from train_station.tests.processes import run_in_other_process
+from user.authentication import user_version_key
+
+STATION_LIST_URL = reverse("train-station:station-list")
+MANAGE_USER_URL = reverse("user:manage")
+
+
+def deactivate_user(user_id):
+    get_user_model().objects.filter(pk=user_id).update(is_active=False)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@mail.test", password="password"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_is_loaded_once_per_token(self):
+        self.client.get(STATION_LIST_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(STATION_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_user_update_drops_cached_user(self):
+        self.client.get(STATION_LIST_URL)
+
+        res = self.client.patch(MANAGE_USER_URL, {"email": "new@mail.test"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(MANAGE_USER_URL)
+        self.assertEqual(res.data["email"], "new@mail.test")
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(STATION_LIST_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(STATION_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_update_drops_cached_user(self):
+        self.client.get(STATION_LIST_URL)
+
+        deactivate_user(self.user.id)
+
+        res = self.client.get(STATION_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_evicted_version_does_not_bring_back_cached_user(self):
+        version_key = user_version_key(self.user.id)
+        cache.delete(version_key)
+        self.client.get(STATION_LIST_URL)
+
+        deactivate_user(self.user.id)
+        cache.delete(version_key)
+
+        res = self.client.get(STATION_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SharedCachedUserTests(TransactionTestCase):
+    def test_user_deactivated_by_other_process_is_rejected(self):
+        user = get_user_model().objects.create_user(
+            email="user@mail.test", password="password"
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+        res = client.get(STATION_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        run_in_other_process(deactivate_user, user.id)
+
+        res = client.get(STATION_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)